@@ -0,0 +1,288 @@
+"""
+Headless A* core shared by the pygame visualizers.
+
+Nothing in this module imports pygame, sleeps or polls events, so the same
+search can run at full speed with no display. The visual front-ends
+(squares.py, hexagons.py, procedural_maze_gen.py and snake_astar.py) pass an
+optional ``on_expand`` callback to watch the search as it runs.
+
+A grid is any object that provides:
+  - neighbors(node): the passable nodes adjacent to ``node``
+  - heuristic(a, b): an admissible estimate of the distance from a to b
+and optionally cost(a, b) for the step between two neighbours; grids
+without it have unit cost moves.
+"""
+
+import random
+import sys
+import time
+
+from open_list import HeapOpenList
+
+# Constants used by the headless timing run
+ROWS = 40
+COLS = 40
+MIN_BLOCKS = 400
+MAX_BLOCKS = 500
+
+
+# Manhattan distance between two (x, y) cells
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class SquareGrid:
+    """4-connected grid of ``width`` x ``height`` cells with a set of blocked (x, y) walls."""
+
+    def __init__(self, width, height, walls=None):
+        self.width = width
+        self.height = height
+        self.walls = walls if walls is not None else set()
+
+    def in_bounds(self, node):
+        x, y = node
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def passable(self, node):
+        return node not in self.walls
+
+    def neighbors(self, node):
+        x, y = node
+        walls = self.walls
+        result = []
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < self.width and 0 <= ny < self.height and (nx, ny) not in walls:
+                result.append((nx, ny))
+        return result
+
+    heuristic = staticmethod(manhattan)
+
+
+# Generate a random set of blocked cells, never blocking the cells in ``exclude``
+def random_walls(width, height, count, exclude=(), rng=random):
+    walls = set()
+    for _ in range(count):
+        cell = (rng.randint(0, width - 1), rng.randint(0, height - 1))
+        if cell in exclude:
+            continue
+        walls.add(cell)
+    return walls
+
+
+class SearchStats:
+    """
+    Counters and phase timings filled in by a solver when passed as ``stats``.
+
+    The solvers count in local variables and add them here once per query,
+    so a search without ``stats`` pays nothing for the instrumentation.
+    Times are in seconds: ``render_time`` is spent in the ``on_expand``
+    callback (where the front-ends draw), ``reconstruct_time`` in rebuilding
+    the path, and ``search_time`` is the rest. The same object can be passed
+    to many queries to accumulate them; see instrument.QueryLog to keep one
+    per query.
+    """
+
+    FIELDS = ("expansions", "pushes", "pops", "stale_pops", "duplicate_pushes", "max_open",
+              "search_time", "reconstruct_time", "render_time")
+
+    def __init__(self):
+        self.expansions = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0   # pops of nodes that were already closed
+        self.duplicate_pushes = 0  # pushes of a node already on the open list, with a lower g (decrease-key)
+        self.max_open = 0     # largest open list size seen
+        self.search_time = 0.0
+        self.reconstruct_time = 0.0
+        self.render_time = 0.0
+        self._started = None
+        self._rendered = 0.0
+
+    @property
+    def heap_ops(self):
+        return self.pushes + self.pops
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def begin(self, on_expand=None):
+        # Start timing a query; returns ``on_expand`` wrapped to time the rendering in it
+        self._started = time.perf_counter()
+        self._rendered = self.render_time
+        if on_expand is None:
+            return None
+
+        def timed(current, came_from):
+            t0 = time.perf_counter()
+            on_expand(current, came_from)
+            self.render_time += time.perf_counter() - t0
+        return timed
+
+    def end(self, expansions, pushes, pops, opened, found, max_open, reconstruct_time=0.0):
+        """
+        Add one query's counts: ``pushes`` excludes the start node, ``opened``
+        is the number of distinct nodes pushed and ``found`` whether the goal
+        was popped. Stale pops and duplicate pushes follow from these, so the
+        solvers do not count them in their loops.
+        """
+        self.expansions += expansions
+        self.pushes += pushes + 1
+        self.pops += pops
+        self.stale_pops += pops - expansions - found
+        self.duplicate_pushes += pushes - opened
+        self.max_open = max(self.max_open, max_open)
+        self.reconstruct_time += reconstruct_time
+        if self._started is not None:
+            elapsed = time.perf_counter() - self._started
+            self.search_time += elapsed - (self.render_time - self._rendered) - reconstruct_time
+            self._started = None
+
+
+def reconstruct_path(came_from, current):
+    path = [current]
+    while current in came_from:
+        current = came_from[current]
+        path.append(current)
+    path.reverse()
+    return path
+
+
+# Event kinds yielded by search_events
+EXPAND = "expand"
+PUSH = "push"
+DONE = "done"
+
+
+def search_events(grid, start, goal, open_list=HeapOpenList, stats=None):
+    """
+    Run the same search as solve as a generator of what changed at each step:
+      (EXPAND, node)        ``node`` was taken from the open list
+      (PUSH, node, parent)  ``node`` was opened with ``parent`` as its parent
+      (DONE, path)          the search finished; ``path`` is None if unreachable
+    Consumers keep their own view of the search from these deltas, so every
+    step costs O(1) no matter how large the search has grown. ``stats`` gets
+    the counters when the search finishes; the time between steps belongs to
+    the consumer, so timing the search is left to it.
+    """
+    heuristic = grid.heuristic
+    neighbors = grid.neighbors
+    cost = getattr(grid, 'cost', None)
+
+    open_set = open_list()
+    open_set.push(heuristic(start, goal), 0, start)
+    came_from = {}
+    g_scores = {start: 0}
+    closed = set()
+    expansions = pushes = pops = peak = 0
+    track_peak = stats is not None
+
+    path = None
+    while open_set:
+        _, g, current = open_set.pop()
+        pops += 1
+        if current in closed:
+            continue
+        yield EXPAND, current
+        if current == goal:
+            path = reconstruct_path(came_from, current)
+            break
+        closed.add(current)
+        expansions += 1
+
+        for neighbor in neighbors(current):
+            if neighbor in closed:
+                continue
+            tentative_g = g + 1 if cost is None else g + cost(current, neighbor)
+            if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                came_from[neighbor] = current
+                open_set.push(tentative_g + heuristic(neighbor, goal), tentative_g, neighbor)
+                pushes += 1
+                yield PUSH, neighbor, current
+        if track_peak and pushes - pops > peak:
+            peak = pushes - pops
+
+    if stats is not None:
+        stats.end(expansions, pushes, pops, len(g_scores) - 1, path is not None, peak + 1)
+    yield DONE, path
+
+
+def solve(grid, start, goal, on_expand=None, stats=None, open_list=HeapOpenList):
+    """
+    Find a shortest path from ``start`` to ``goal`` on ``grid``.
+
+    Returns the path as a list of nodes (start and goal included), or None if
+    the goal is unreachable. If ``on_expand`` is given it is called as
+    ``on_expand(current, came_from)`` every time a node is taken from the open
+    list, which is where the front-ends draw; the search itself never renders.
+    A SearchStats passed as ``stats`` is filled in with the search counters,
+    and ``open_list`` selects the open list class (see open_list.py).
+    """
+    if stats is not None:
+        on_expand = stats.begin(on_expand)
+    heuristic = grid.heuristic
+    neighbors = grid.neighbors
+    cost = getattr(grid, 'cost', None)
+
+    open_set = open_list()
+    push = open_set.push
+    pop = open_set.pop
+    push(heuristic(start, goal), 0, start)
+    came_from = {}
+    g_scores = {start: 0}
+    closed = set()
+    expansions = pushes = pops = peak = 0
+    track_peak = stats is not None  # the open list size is only followed for stats
+    reconstruct_time = 0.0
+
+    path = None
+    while open_set:
+        _, g, current = pop()
+        pops += 1
+        if current in closed:
+            continue
+        if on_expand is not None:
+            on_expand(current, came_from)
+        if current == goal:
+            t0 = time.perf_counter()
+            path = reconstruct_path(came_from, current)
+            reconstruct_time = time.perf_counter() - t0
+            break
+        closed.add(current)
+        expansions += 1
+
+        for neighbor in neighbors(current):
+            if neighbor in closed:
+                continue
+            tentative_g = g + 1 if cost is None else g + cost(current, neighbor)
+            if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                came_from[neighbor] = current
+                push(tentative_g + heuristic(neighbor, goal), tentative_g, neighbor)
+                pushes += 1
+        # Open list size is pushes + 1 - pops
+        if track_peak and pushes - pops > peak:
+            peak = pushes - pops
+
+    if stats is not None:
+        stats.end(expansions, pushes, pops, len(g_scores) - 1, path is not None, peak + 1, reconstruct_time)
+    return path
+
+
+if __name__ == '__main__':
+    # Time the same random boards squares.py shows, without any rendering.
+    # An optional argument sets the board size, keeping the wall density:
+    #   python astar.py 1000
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else COLS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else max(1, 200 * COLS * ROWS // (size * size))
+    start = (0, 0)
+    end = (size - 1, size - 1)
+    found = 0
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        count = random.randint(MIN_BLOCKS, MAX_BLOCKS) * size * size // (COLS * ROWS)
+        walls = random_walls(size, size, count, (start, end))
+        if solve(SquareGrid(size, size, walls), start, end) is not None:
+            found += 1
+    elapsed = time.perf_counter() - t0
+    print(f"{runs} boards ({size}x{size}), {found} solvable: {elapsed * 1000 / runs:.3f} ms per search")
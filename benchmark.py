@@ -0,0 +1,184 @@
+"""
+Reproducible benchmark of the headless solvers.
+
+Every case of a fixed matrix (board type x size x wall density x seed x
+solver) is built from its own seed, so two runs on the same code search
+exactly the same boards. Board types:
+  - random:      square grid with random walls at the squares.py density
+                 (MIN_BLOCKS and MAX_BLOCKS walls per 40x40 board)
+  - backtracking, prim, eller: the mazes of procedural_maze_gen, from maze_gen
+  - hex:         offset hex grid with random walls, as in hexagons.py
+
+Each search reports wall-clock time, expansions, heap pushes, peak traced
+memory and path length. The time is the best of --repeats runs without
+stats, since a single run is at the mercy of whatever else the machine
+is doing. The counters and peak memory (under tracemalloc) come from
+separate runs so they do not slow the timed ones down.
+
+Results are written as JSON; passing an earlier file with --compare flags
+the cases whose counters changed, and the ones that got slower than
+--threshold among those taking at least --min-time (below a few
+milliseconds, timer and scheduling noise exceed the threshold):
+    python benchmark.py --out before.json
+    python benchmark.py --out after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from astar import COLS, MAX_BLOCKS, MIN_BLOCKS, ROWS, SearchStats, random_walls
+from compact_grid import CompactGrid, CompactHexGrid
+from maze_gen import backtracking, eller, prim
+from solvers import SOLVERS
+
+SIZES = [40, 128, 512, 2048]
+SEEDS = [0, 1, 2]
+REPEATS = 5
+MIN_TIME = 0.005  # seconds; faster cases are not checked for time regressions
+# Wall densities of the squares.py boards
+DENSITIES = [MIN_BLOCKS / (COLS * ROWS), MAX_BLOCKS / (COLS * ROWS)]
+
+
+def _random_board(grid_type, size, density, rng):
+    start, goal = (0, 0), (size - 1, size - 1)
+    walls = random_walls(size, size, int(density * size * size), (start, goal), rng)
+    grid = grid_type.from_walls(size, size, walls)
+    return grid, grid.index(*start), grid.index(*goal)
+
+
+def _maze_board(generator, size, rng):
+    start, goal = (0, 0), (size - 2, size - 2)
+    grid = generator(size, size, start, rng.random())
+    return grid, grid.index(*start), grid.index(*goal)
+
+
+# name -> (build(size, density, rng), uses density, solvers that support it)
+BOARDS = {
+    "random": (lambda size, density, rng: _random_board(CompactGrid, size, density, rng), True, list(SOLVERS)),
+    "backtracking": (lambda size, density, rng: _maze_board(backtracking, size, rng), False, list(SOLVERS)),
+    "prim": (lambda size, density, rng: _maze_board(prim, size, rng), False, list(SOLVERS)),
+    "eller": (lambda size, density, rng: _maze_board(eller, size, rng), False, list(SOLVERS)),
+    "hex": (lambda size, density, rng: _random_board(CompactHexGrid, size, density, rng), True, ["astar", "bidirectional"]),
+}
+
+
+def run_case(board, size, density, seed, solver, repeats=REPEATS):
+    """Build one board from ``seed`` and return the measurements of solving it."""
+    build, _, _ = BOARDS[board]
+    grid, start, goal = build(size, density, random.Random(seed))
+    solve = SOLVERS[solver]
+
+    stats = SearchStats()
+    path = solve(grid, start, goal, stats=stats)
+
+    elapsed = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        solve(grid, start, goal)
+        elapsed = min(elapsed, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    solve(grid, start, goal)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "board": board,
+        "size": size,
+        "density": density,
+        "seed": seed,
+        "solver": solver,
+        "time": round(elapsed, 6),
+        "expansions": stats.expansions,
+        "pushes": stats.pushes,
+        "peak_memory": peak,
+        "path_length": None if path is None else len(path),
+    }
+
+
+def run_matrix(boards, sizes, densities, seeds, solvers, log=None, repeats=REPEATS):
+    results = []
+    for board in boards:
+        _, uses_density, supported = BOARDS[board]
+        for size in sizes:
+            for density in (densities if uses_density else [None]):
+                for seed in seeds:
+                    for solver in solvers:
+                        if solver not in supported:
+                            continue
+                        result = run_case(board, size, density, seed, solver, repeats)
+                        results.append(result)
+                        if log is not None:
+                            log(result)
+    return results
+
+
+def _case_key(result):
+    return result["board"], result["size"], result["density"], result["seed"], result["solver"]
+
+
+def compare(results, baseline, threshold, min_time=MIN_TIME):
+    """
+    Return a description of every case that regressed against ``baseline``.
+    Times only count as regressions for cases now taking ``min_time`` or more.
+    """
+    previous = {_case_key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(_case_key(result))
+        if old is None:
+            continue
+        name = "/".join(str(part) for part in _case_key(result))
+        for counter in ("expansions", "pushes", "path_length"):
+            if result[counter] != old[counter]:
+                regressions.append(f"{name}: {counter} {old[counter]} -> {result[counter]}")
+        if result["time"] >= min_time and result["time"] > old["time"] * (1 + threshold):
+            regressions.append(f"{name}: time {old['time']:.4f}s -> {result['time']:.4f}s")
+    return regressions
+
+
+def _print_result(r):
+    density = "-" if r["density"] is None else f"{r['density']:.3f}"
+    length = "-" if r["path_length"] is None else r["path_length"]
+    print(f"{r['board']:>12} {r['size']:>5} {density:>6} {r['seed']:>4} {r['solver']:>13} "
+          f"{r['time'] * 1000:10.2f} ms {r['expansions']:>9} exp {r['pushes']:>9} push "
+          f"{r['peak_memory'] / 1024:10.0f} KiB  path {length}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the solvers over a fixed seed matrix.")
+    parser.add_argument("--boards", nargs="+", choices=list(BOARDS), default=list(BOARDS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--seeds", nargs="+", type=int, default=SEEDS)
+    parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown (default: 0.2)")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs per case, the best one counts")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME,
+                        help="seconds under which a case is not checked for slowdowns (default: 0.005)")
+    args = parser.parse_args()
+
+    results = run_matrix(args.boards, args.sizes, DENSITIES, args.seeds, args.solvers, _print_result,
+                         args.repeats)
+    with open(args.out, "w") as f:
+        json.dump({
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, f, indent=1)
+    print(f"{len(results)} cases -> {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold, args.min_time)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,210 @@
+"""
+Bidirectional A*.
+
+solve_bidirectional has the same signature and result as astar.solve but
+runs two searches at once: a forward one from the start towards the goal
+and a backward one from the goal towards the start, each with its own open
+list, g-scores and parents. Each step expands the side with the smaller
+open list. Whenever a node gets a g-score on one side and already has one
+on the other, the two halves form a path, and the cheapest one found so
+far is kept as ``best``.
+
+The first meeting is not necessarily the shortest path, and stopping when
+either frontier's smallest f reaches ``best`` lets both searches grow far
+past the middle. Instead both sides order their open lists by the average
+of the two heuristics, p(v) = (h(v, goal) - h(v, start)) / 2 forward and
+-p(v) backward. These keys are consistent and the two potentials cancel
+out on any path, so once the smallest forward key plus the smallest
+backward key reaches ``best`` no path left to find can be shorter
+(Goldberg and Harrelson's stopping rule for bidirectional A*). This needs
+the grid's heuristic to be consistent, as it is on the square grids, and
+moves to be symmetric, since the backward search walks the edges in
+reverse.
+
+On long corridor mazes the two frontiers meet in the middle instead of the
+forward search flooding most of the maze: on 512x512 mazes it expands
+10-35% fewer cells than A*, although each push costs two heuristics.
+
+Running this module compares it with one-directional A* on the same
+seeded mazes and checks that every path has the optimal length:
+    python bidirectional.py [size] [seeds]
+"""
+
+import math
+import random
+import sys
+import time
+
+from astar import SearchStats, random_walls, solve
+from compact_grid import CompactGrid, DiagonalGrid
+from jps import path_cost
+from maze_gen import GENERATORS
+from open_list import HeapOpenList
+
+INF = float('inf')
+
+
+def solve_bidirectional(grid, start, goal, on_expand=None, stats=None, open_list=HeapOpenList):
+    """
+    Find a shortest path from ``start`` to ``goal`` searching from both ends.
+
+    Arguments and result match astar.solve. ``on_expand`` gets the parents
+    of the side that expanded the node, so following them leads to the
+    start for the forward search and to the goal for the backward one. The
+    two maps are never passed merged: a node reached by both searches would
+    chain from one tree into the other, and the goal can have a forward
+    parent while the start has a backward one, which closes a cycle.
+    """
+    if stats is not None:
+        on_expand = stats.begin(on_expand)
+    heuristic = grid.heuristic
+    neighbors = grid.neighbors
+    cost = getattr(grid, 'cost', None)
+
+    # Index 0 is the forward search, 1 the backward one. Both use the average
+    # of the two heuristics, scaled by 2 and offset to stay non-negative integers
+    # on unit-cost grids: key(v) = 2g(v) + h(v, target) - h(v, origin) + h(start, goal)
+    offset = heuristic(start, goal)
+    open_sets = [open_list(), open_list()]
+    open_sets[0].push(2 * offset, 0, start)
+    open_sets[1].push(2 * offset, 0, goal)
+    targets = [goal, start]
+    origins = [start, goal]
+    g_scores = [{start: 0}, {goal: 0}]
+    parents = [{}, {}]
+    closed = [set(), set()]
+    last_keys = [2 * offset, 2 * offset]
+    best = 0 if start == goal else INF
+    meeting = start
+    expansions = pushes = pops = peak = 0
+    track_peak = stats is not None
+    reconstruct_time = 0.0
+
+    while open_sets[0] and open_sets[1]:
+        # No path left to find can beat the best meeting (see the module docstring);
+        # keys pop in increasing order, so the last popped ones bound the open lists
+        if last_keys[0] + last_keys[1] >= 2 * (best + offset):
+            break
+        side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+        open_set = open_sets[side]
+        key, g, current = open_set.pop()
+        pops += 1
+        last_keys[side] = key
+        side_closed = closed[side]
+        if current in side_closed:
+            continue
+        if on_expand is not None:
+            on_expand(current, parents[side])
+        side_closed.add(current)
+        expansions += 1
+
+        target = targets[side]
+        origin = origins[side]
+        side_g = g_scores[side]
+        other_g = g_scores[1 - side]
+        side_parents = parents[side]
+        for neighbor in neighbors(current):
+            if neighbor in side_closed:
+                continue
+            # Both directions cross the same edge, so the forward cost serves the backward search too
+            if cost is None:
+                tentative_g = g + 1
+            else:
+                tentative_g = g + (cost(current, neighbor) if side == 0 else cost(neighbor, current))
+            if neighbor not in side_g or tentative_g < side_g[neighbor]:
+                side_g[neighbor] = tentative_g
+                side_parents[neighbor] = current
+                open_set.push(2 * tentative_g + heuristic(neighbor, target) - heuristic(neighbor, origin) + offset,
+                              tentative_g, neighbor)
+                pushes += 1
+                other = other_g.get(neighbor)
+                if other is not None and tentative_g + other < best:
+                    best = tentative_g + other
+                    meeting = neighbor
+        if track_peak and pushes - pops > peak:
+            peak = pushes - pops
+
+    path = None
+    if best < INF:
+        t0 = time.perf_counter()
+        path = [meeting]
+        forward, backward = parents
+        node = meeting
+        while node in forward:
+            node = forward[node]
+            path.append(node)
+        path.reverse()
+        node = meeting
+        while node in backward:
+            node = backward[node]
+            path.append(node)
+        reconstruct_time = time.perf_counter() - t0
+
+    if stats is not None:
+        # Both ends start on an open list (SearchStats.end adds one of them) and
+        # the search stops between pops, so every pop is an expansion or stale
+        opened = len(g_scores[0]) + len(g_scores[1]) - 2
+        stats.end(expansions, pushes + 1, pops, opened + 1, False, peak + 2, reconstruct_time)
+    return path
+
+
+def check_parent_chains(grid_class, size, boards, rng):
+    """
+    Solve random ``size`` x ``size`` boards and check on every expansion that
+    the parents ``on_expand`` gets lead back to the start or the goal
+    without looping, as the front-ends follow them on every frame.
+    """
+    for _ in range(boards):
+        walls = random_walls(size, size, rng.randint(0, size * size // 2), rng=rng)
+        grid = grid_class.from_walls(size, size, walls)
+        free = [i for i in range(grid.size) if not grid.is_wall(i)]
+        if not free:
+            continue
+        start, goal = rng.choice(free), rng.choice(free)
+
+        def on_expand(current, came_from):
+            node = current
+            for _ in range(grid.size):
+                if node not in came_from:
+                    break
+                node = came_from[node]
+            assert node in (start, goal), (grid_class.__name__, sorted(walls), start, goal, current)
+
+        path = solve_bidirectional(grid, start, goal, on_expand)
+        expected = solve(grid, start, goal)
+        assert (path is None) == (expected is None)
+        # Diagonal costs add up in a different order from each end
+        assert path is None or math.isclose(path_cost(grid, path), path_cost(grid, expected))
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    seeds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = random.Random(0)
+    for grid_class in (CompactGrid, DiagonalGrid):
+        check_parent_chains(grid_class, 10, 5000, rng)
+    print("random boards: parents always lead back to the start or the goal")
+    solvers = {"A*": solve, "bidir": solve_bidirectional}
+    for name, generator in GENERATORS.items():
+        stats = {label: SearchStats() for label in solvers}
+        times = dict.fromkeys(solvers, 0.0)
+        for seed in range(seeds):
+            maze = generator(size, size, seed=seed)
+            # Rooms sit on even coordinates; the start is in the left quarter and the goal in the right one
+            rooms = range(0, size, 2)
+            quarter = len(rooms) // 4
+            start = maze.index(rng.choice(rooms[:quarter]), rng.choice(rooms))
+            goal = maze.index(rng.choice(rooms[-quarter:]), rng.choice(rooms))
+            costs = []
+            for label, solver in solvers.items():
+                t0 = time.perf_counter()
+                path = solver(maze, start, goal, stats=stats[label])
+                times[label] += time.perf_counter() - t0
+                assert path[0] == start and path[-1] == goal
+                assert all(b in maze.neighbors(a) for a, b in zip(path, path[1:]))
+                costs.append(path_cost(maze, path))
+            assert costs[0] == costs[1], (name, seed, costs)
+        print(f"{name} {size}x{size}, {seeds} seeds: same path lengths")
+        for label in solvers:
+            print(f"  {label:>5}: {times[label] * 1000 / seeds:8.2f} ms  "
+                  f"{stats[label].expansions / seeds:10.1f} expansions  {stats[label].heap_ops / seeds:10.1f} heap ops")
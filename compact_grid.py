@@ -0,0 +1,251 @@
+"""
+Compact grids backed by a flat bytearray.
+
+Each cell is one byte holding bit flags (wall, visited, in-path, start, end),
+and nodes are plain integer indices ``y * width + x``, so neighbours are
+found with index arithmetic instead of per-cell objects. A 4096x4096 grid
+takes 16 MB, and resetting the search flags between runs is a single
+``bytearray.translate`` over the buffer. ``cells`` can also be any byte
+buffer, such as the memory-mapped wall plane map_file.load_map returns.
+
+All grid types satisfy the grid protocol of astar.solve, so the solver
+works on them directly; paths come back as lists of indices, and
+``coords`` turns an index back into (x, y).
+"""
+
+import math
+from array import array
+
+WALL = 1
+VISITED = 2
+IN_PATH = 4
+START = 8
+END = 16
+
+SQRT2 = math.sqrt(2)
+
+# Translation table that clears every flag except WALL
+KEEP_WALLS = bytes(b & WALL for b in range(256))
+
+
+def adjacent(i, width, size):
+    """In-bounds 4-neighbours of cell ``i`` on a ``width``-wide board of ``size`` cells, walls included."""
+    result = []
+    x = i % width
+    if x + 1 < width:
+        result.append(i + 1)
+    if x > 0:
+        result.append(i - 1)
+    if i + width < size:
+        result.append(i + width)
+    if i >= width:
+        result.append(i - width)
+    return result
+
+
+def around(i, width, height):
+    """Cell ``i`` and its in-bounds 8 neighbours, walls included."""
+    y, x = divmod(i, width)
+    return [ny * width + nx
+            for ny in range(max(y - 1, 0), min(y + 2, height))
+            for nx in range(max(x - 1, 0), min(x + 2, width))]
+
+
+class CompactGrid:
+    """4-connected square grid of ``width`` x ``height`` one-byte cells."""
+
+    diagonal = False
+    square = True  # neighbours are the square-lattice steps, which jps.solve_jps relies on
+
+    def __init__(self, width, height, cells=None):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.cells = bytearray(self.size) if cells is None else cells
+        self.version = 0  # bumped by set_wall and fill, so caches can tell the walls changed
+
+    @classmethod
+    def from_walls(cls, width, height, walls):
+        # Build a grid from a set of blocked (x, y) cells
+        grid = cls(width, height)
+        cells = grid.cells
+        for x, y in walls:
+            cells[y * width + x] = WALL
+        return grid
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def coords(self, i):
+        y, x = divmod(i, self.width)
+        return x, y
+
+    def is_wall(self, i):
+        return self.cells[i] & WALL
+
+    def set_wall(self, i, wall=True):
+        self.version += 1
+        if wall:
+            self.cells[i] |= WALL
+        else:
+            self.cells[i] &= ~WALL
+
+    def fill(self, flags=0):
+        # Set every cell to ``flags`` in a single buffer write
+        self.cells[:] = bytes((flags,)) * self.size
+        self.version += 1
+
+    def reset_flags(self):
+        # Clear visited/in-path/start/end flags and keep the walls
+        cells = self.cells
+        if not isinstance(cells, bytearray):
+            # A memoryview of a mapped file (see map_file.py) has no translate
+            cells = bytes(cells)
+        self.cells[:] = cells.translate(KEEP_WALLS)
+
+    def walls(self):
+        # (x, y) of every wall cell, for callers that want coordinates
+        w = self.width
+        return {(i % w, i // w) for i, c in enumerate(self.cells) if c & WALL}
+
+    def neighbors(self, i):
+        w = self.width
+        cells = self.cells
+        x = i % w
+        result = []
+        if x + 1 < w and not cells[i + 1] & WALL:
+            result.append(i + 1)
+        if x > 0 and not cells[i - 1] & WALL:
+            result.append(i - 1)
+        j = i + w
+        if j < self.size and not cells[j] & WALL:
+            result.append(j)
+        j = i - w
+        if j >= 0 and not cells[j] & WALL:
+            result.append(j)
+        return result
+
+    def heuristic(self, a, b):
+        w = self.width
+        ay, ax = divmod(a, w)
+        by, bx = divmod(b, w)
+        return abs(ax - bx) + abs(ay - by)
+
+
+class DiagonalGrid(CompactGrid):
+    """8-connected square grid; diagonal moves cost sqrt(2) and may not cut wall corners."""
+
+    diagonal = True
+
+    def neighbors(self, i):
+        w = self.width
+        cells = self.cells
+        x = i % w
+        result = []
+        east = x + 1 < w and not cells[i + 1] & WALL
+        west = x > 0 and not cells[i - 1] & WALL
+        south = i + w < self.size and not cells[i + w] & WALL
+        north = i >= w and not cells[i - w] & WALL
+        if east:
+            result.append(i + 1)
+        if west:
+            result.append(i - 1)
+        if south:
+            result.append(i + w)
+            if east and not cells[i + w + 1] & WALL:
+                result.append(i + w + 1)
+            if west and not cells[i + w - 1] & WALL:
+                result.append(i + w - 1)
+        if north:
+            result.append(i - w)
+            if east and not cells[i - w + 1] & WALL:
+                result.append(i - w + 1)
+            if west and not cells[i - w - 1] & WALL:
+                result.append(i - w - 1)
+        return result
+
+    def cost(self, a, b):
+        d = b - a
+        return 1 if d == 1 or d == -1 or d == self.width or d == -self.width else SQRT2
+
+    def heuristic(self, a, b):
+        # Octile distance
+        w = self.width
+        ay, ax = divmod(a, w)
+        by, bx = divmod(b, w)
+        dx = abs(ax - bx)
+        dy = abs(ay - by)
+        return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+
+class CompactHexGrid(CompactGrid):
+    """
+    Offset-row hexagonal grid: odd rows are shifted half a cell to the right.
+
+    Cells are still stored row by row, but distances are computed in axial
+    coordinates (q, r) = (x - y // 2, y), where the six neighbours of a hex
+    are the steps (+-1, 0), (0, +-1) and (+1, -1), (-1, +1). The hex
+    distance max(|dq|, |dr|, |dq + dr|) is the exact number of moves on an
+    empty board, so it is the tightest admissible heuristic without
+    preprocessing. The six neighbour indices of every cell (-1 off the
+    board) are computed once per board shape and shared by all the grids
+    of that shape, so ``neighbors`` only checks walls.
+    """
+
+    square = False
+    _tables = {}  # (width, height) -> array of 6 neighbour indices per cell
+
+    def __init__(self, width, height, cells=None):
+        super().__init__(width, height, cells)
+        table = self._tables.get((width, height))
+        if table is None:
+            table = self._tables[(width, height)] = self._neighbor_table(width, height)
+        self._table = table
+
+    @staticmethod
+    def _neighbor_table(width, height):
+        table = array('i', [-1]) * (6 * width * height)
+        for y in range(height):
+            base = y * width
+            # Columns reached by the diagonal moves depend on the row parity
+            shift = y % 2 - 1
+            for x in range(width):
+                t = 6 * (base + x)
+                if x + 1 < width:
+                    table[t] = base + x + 1
+                if x > 0:
+                    table[t + 1] = base + x - 1
+                left = x + shift
+                right = left + 1
+                for k, row in ((2, y + 1), (4, y - 1)):
+                    if 0 <= row < height:
+                        if left >= 0:
+                            table[t + k] = row * width + left
+                        if right < width:
+                            table[t + k + 1] = row * width + right
+        return table
+
+    def axial(self, i):
+        y, x = divmod(i, self.width)
+        return x - (y >> 1), y
+
+    def cube(self, i):
+        q, r = self.axial(i)
+        return q, r, -q - r
+
+    def from_axial(self, q, r):
+        return r * self.width + q + (r >> 1)
+
+    def neighbors(self, i):
+        cells = self.cells
+        t = 6 * i
+        return [j for j in self._table[t:t + 6] if j >= 0 and not cells[j] & WALL]
+
+    def heuristic(self, a, b):
+        # Hex distance in axial coordinates
+        w = self.width
+        ay, ax = divmod(a, w)
+        by, bx = divmod(b, w)
+        dq = ax - (ay >> 1) - bx + (by >> 1)
+        dr = ay - by
+        return max(abs(dq), abs(dr), abs(dq + dr))
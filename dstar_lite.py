@@ -0,0 +1,169 @@
+"""
+D* Lite incremental planner for a 4-connected CompactGrid.
+
+The planner searches backwards from the goal and keeps its g/rhs values
+between calls. When the start moves or some cells change between wall and
+free, only the vertices whose values those changes affect are repaired,
+instead of searching again from scratch. The snake can plan with it
+(SnakeSim.incremental), since its obstacles only change at the head and
+the tail between two replans. The repairs pay off on the long walks with
+few changes replayed below. They do not in snake games, where every new
+apple needs a fresh search and A* on a 30x30 board is faster.
+
+Usage:
+    planner = DStarLite(grid, start, goal)
+    path = planner.plan()
+    ...toggle walls in grid...
+    planner.update(new_start, changed_cells)
+    path = planner.plan()
+
+Running this module replays random walks with moving walls and compares
+the expansions against a fresh A* search at every step:
+    python dstar_lite.py
+"""
+
+import heapq
+import random
+import sys
+
+from astar import SearchStats, random_walls, solve
+from compact_grid import WALL, CompactGrid, adjacent
+
+INF = float('inf')
+
+
+class DStarLite:
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.km = 0
+        self.g = [INF] * grid.size
+        self.rhs = [INF] * grid.size
+        self.rhs[goal] = 0
+        self._queue = []
+        self._queued = {}  # node -> key it is queued with; heap entries with another key are stale
+        self.expansions = 0
+        self._insert(goal, (grid.heuristic(start, goal), 0))
+
+    def _insert(self, node, key):
+        self._queued[node] = key
+        heapq.heappush(self._queue, (key, node))
+
+    def _top(self):
+        # Drop stale heap entries left behind by re-keyed or removed nodes
+        queue = self._queue
+        queued = self._queued
+        while queue:
+            key, node = queue[0]
+            if queued.get(node) == key:
+                return key, node
+            heapq.heappop(queue)
+        return (INF, INF), None
+
+    def _key(self, node):
+        m = min(self.g[node], self.rhs[node])
+        return m + self.grid.heuristic(self.start, node) + self.km, m
+
+    def _around(self, node):
+        # In-bounds 4-neighbours, walls included: their edge costs are what changes
+        return adjacent(node, self.grid.width, self.grid.size)
+
+    def _update_vertex(self, node):
+        cells = self.grid.cells
+        if node != self.goal:
+            best = INF
+            if not cells[node] & WALL:
+                g = self.g
+                for succ in self._around(node):
+                    if not cells[succ] & WALL and g[succ] + 1 < best:
+                        best = g[succ] + 1
+            self.rhs[node] = best
+        self._queued.pop(node, None)
+        if self.g[node] != self.rhs[node]:
+            self._insert(node, self._key(node))
+
+    def _compute_shortest_path(self):
+        g = self.g
+        rhs = self.rhs
+        start = self.start
+        while True:
+            k_old, node = self._top()
+            if not (k_old < self._key(start) or rhs[start] != g[start]):
+                return
+            heapq.heappop(self._queue)
+            del self._queued[node]
+            self.expansions += 1
+            k_new = self._key(node)
+            if k_old < k_new:
+                self._insert(node, k_new)
+            elif g[node] > rhs[node]:
+                g[node] = rhs[node]
+                for pred in self._around(node):
+                    self._update_vertex(pred)
+            else:
+                g[node] = INF
+                self._update_vertex(node)
+                for pred in self._around(node):
+                    self._update_vertex(pred)
+
+    def update(self, start, changed=()):
+        """Move the start to ``start`` and repair around ``changed`` cells (walls toggled in the grid)."""
+        if start != self.start:
+            self.km += self.grid.heuristic(self.start, start)
+            self.start = start
+        for node in changed:
+            self._update_vertex(node)
+            for pred in self._around(node):
+                self._update_vertex(pred)
+
+    def plan(self):
+        """Return the shortest path from start to goal as a list of indices, or None."""
+        self._compute_shortest_path()
+        g = self.g
+        cells = self.grid.cells
+        node = self.start
+        if g[node] == INF:
+            return None
+        path = [node]
+        while node != self.goal:
+            best = None
+            best_g = INF
+            for succ in self._around(node):
+                if not cells[succ] & WALL and g[succ] < best_g:
+                    best, best_g = succ, g[succ]
+            if best is None:
+                return None
+            node = best
+            path.append(node)
+        return path
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    start, goal = (0, 0), (size - 1, size - 1)
+    grid = CompactGrid.from_walls(size, size, random_walls(size, size, size * size // 5, (start, goal), rng))
+    s, e = grid.index(*start), grid.index(*goal)
+    planner = DStarLite(grid, s, e)
+    path = planner.plan()
+    astar_stats = SearchStats()
+    replans = 0
+    while path is not None and len(path) > 1 and replans < steps:
+        # Step along the path and flip a few random cells, away from the agent and goal
+        s = path[1]
+        changed = []
+        for _ in range(3):
+            cell = rng.randrange(grid.size)
+            if cell not in (s, e):
+                grid.set_wall(cell, not grid.is_wall(cell))
+                changed.append(cell)
+        planner.update(s, changed)
+        path = planner.plan()
+        expected = solve(grid, s, e, stats=astar_stats)
+        assert (path is None) == (expected is None)
+        assert path is None or len(path) == len(expected)
+        replans += 1
+    print(f"{replans} replans on {size}x{size}: D* Lite {planner.expansions} expansions, "
+          f"A* from scratch {astar_stats.expansions}")
@@ -0,0 +1,129 @@
+"""
+Reusable flood fill over a width x height grid.
+
+The visited buffer is allocated once and "cleared" by bumping a
+generation counter: a cell counts as visited only when its stamp equals
+the current generation. The queue is a deque, so every fill is O(area).
+
+``areas`` answers the snake's fallback question for several candidate
+heads in one pass: it labels the connected components around them once
+and combines component sizes, rather than flooding once per candidate.
+
+Cells are flat indices ``y * width + x``; ``blocked`` is any indexable
+buffer where a non-zero value means the cell cannot be entered.
+"""
+
+from array import array
+from collections import deque
+
+from compact_grid import adjacent
+
+
+class FloodFill:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.stamp = array('I', bytes(4 * self.size))
+        self.label = array('i', bytes(4 * self.size))
+        self.generation = 0
+
+    def _next_generation(self):
+        self.generation += 1
+        if self.generation == 0xFFFFFFFF:
+            self.stamp = array('I', bytes(4 * self.size))
+            self.generation = 1
+        return self.generation
+
+    def _neighbors(self, i):
+        return adjacent(i, self.width, self.size)
+
+    def area(self, start, blocked):
+        """Number of cells reachable from ``start`` (counted even if blocked itself)."""
+        gen = self._next_generation()
+        stamp = self.stamp
+        neighbors = self._neighbors
+        stamp[start] = gen
+        queue = deque([start])
+        area = 0
+        while queue:
+            i = queue.popleft()
+            area += 1
+            for j in neighbors(i):
+                if stamp[j] != gen and not blocked[j]:
+                    stamp[j] = gen
+                    queue.append(j)
+        return area
+
+    def areas(self, starts, blocked):
+        """
+        For every cell in ``starts``, the area ``area(start, blocked)`` would
+        return with that start cell blocked as well. This is the space left
+        after moving the snake's head there.
+        """
+        gen = self._next_generation()
+        stamp = self.stamp
+        label = self.label
+        neighbors = self._neighbors
+
+        # Start cells stay out of the components; the others may reconnect them
+        open_starts = {s for s in starts if not blocked[s]}
+        for s in open_starts:
+            stamp[s] = gen
+            label[s] = -1
+
+        # Label the components touching any start, one BFS each
+        sizes = []
+        touching = []  # component -> open start cells next to it
+        for s in starts:
+            for j in neighbors(s):
+                if blocked[j] or stamp[j] == gen:
+                    continue
+                k = len(sizes)
+                stamp[j] = gen
+                label[j] = k
+                queue = deque([j])
+                size = 0
+                while queue:
+                    i = queue.popleft()
+                    size += 1
+                    for n in neighbors(i):
+                        if stamp[n] != gen and not blocked[n]:
+                            stamp[n] = gen
+                            label[n] = k
+                            queue.append(n)
+                sizes.append(size)
+                touching.append(set())
+        for s in open_starts:
+            for j in neighbors(s):
+                if not blocked[j] and label[j] >= 0:
+                    touching[label[j]].add(s)
+
+        result = []
+        for s in starts:
+            area = 1
+            seen_components = set()
+            seen_starts = {s}
+            frontier = [s]
+            while frontier:
+                c = frontier.pop()
+                for j in neighbors(c):
+                    if blocked[j] or j == s:
+                        continue
+                    if j in open_starts:
+                        if j not in seen_starts:
+                            seen_starts.add(j)
+                            area += 1
+                            frontier.append(j)
+                        continue
+                    k = label[j]
+                    if k not in seen_components:
+                        seen_components.add(k)
+                        area += sizes[k]
+                        for other in touching[k]:
+                            if other not in seen_starts:
+                                seen_starts.add(other)
+                                area += 1
+                                frontier.append(other)
+            result.append(area)
+        return result
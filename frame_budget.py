@@ -0,0 +1,57 @@
+"""
+Per-frame search budgets for the visual front-ends.
+
+The searches report every expansion to the front-end, which used to draw
+a frame for each one, so a large search could only be watched at one
+expansion per frame. A FrameBudget splits the search into frames
+instead. ``step()`` is called once per expansion and returns True when
+the frame has used up its budget of ``steps`` expansions or ``seconds``
+of search time (whichever comes first; None means no limit). The
+front-end then draws and calls ``wait()``, which holds the frame rate at
+``fps`` and starts the next frame's budget:
+
+    budget = FrameBudget(steps=500, fps=30)
+    def on_expand(current, came_from):
+        ...record the change...
+        if budget.step():
+            ...draw the frame...
+            budget.wait()
+
+With the defaults (one step, no time limit, no fps cap), every expansion
+gets its own frame, as before.
+"""
+
+import time
+
+
+class FrameBudget:
+    def __init__(self, steps=1, seconds=None, fps=None):
+        self.steps = steps
+        self.seconds = seconds
+        self.fps = fps
+        self.frames = 0
+        self._frame_start = time.perf_counter()
+        self.start()
+
+    def start(self):
+        # Begin a new frame's budget
+        self._left = self.steps
+        self._deadline = None if self.seconds is None else time.perf_counter() + self.seconds
+
+    def step(self):
+        """Count one expansion; True once this frame's budget is spent."""
+        if self._left is not None:
+            self._left -= 1
+            if self._left <= 0:
+                return True
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+
+    def wait(self):
+        # Hold the frame rate after a frame was drawn, then start the next budget
+        self.frames += 1
+        if self.fps is not None:
+            remaining = self._frame_start + 1 / self.fps - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+        self._frame_start = time.perf_counter()
+        self.start()
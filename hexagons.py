@@ -1,56 +1,104 @@
 import pygame
 import math
 from time import sleep
-import heapq
-import random
-
-# Hexagon class to represent each hexagonal cell in the grid
-class Hexagon:
-    def __init__(self, x, y, size):
-        self.x = x
-        self.y = y
-        self.size = size
-        self.color = WHITE
-        self.posx = x * size * 1.76
-        self.posy = y * size * 1.5
-        self.directions = []
-        self.wall = False
-
-    # Draw the hexagon on the Pygame window
-    def draw(self):
-        if self.wall: self.color = BLACK
-        points = []
-        for i in range(6):
-            angle_deg = 60 * i + 90
-            angle_rad = math.radians(angle_deg)
-            offset = 0 if self.y % 2 == 0 else self.size * 0.9
-            points.append((offset + 45 + self.posx + self.size * math.cos(angle_rad),
-                           60 + self.posy + self.size * math.sin(angle_rad)))
-
-        pygame.draw.polygon(WINDOW, self.color, points)
-        pygame.draw.polygon(WINDOW, BLACK, points, 1)
-
-    # Get the neighboring hexagons
-    def get_neigbors(self):
-        if self.y % 2 == 0:
-            self.directions = [(self.x + 1, self.y + 0), (self.x + 0, self.y + 1), (self.x + -1,self.y +  1), (self.x + -1,self.y +  0), (self.x + -1,self.y +  -1), (self.x + 0, self.y + -1)]
-        else:
-            self.directions = [(self.x + 1, self.y + 0), (self.x + 1, self.y + 1), (self.x + 0, self.y + 1), (self.x + -1,self.y +  0), (self.x + 0, self.y + -1), (self.x + 1, self.y + -1)]
+import sys
+
+from astar import random_walls, reconstruct_path
+from compact_grid import CompactHexGrid
+from frame_budget import FrameBudget
+from grid_view import opened_since
+from open_list import BucketOpenList
+from soak import run_boards
+from solvers import SOLVERS
+
+class HexView:
+    """
+    Hex board renderer that only redraws the hexes whose colour changed.
+
+    The layout (where each hex goes for a given HEX_SIZE) and the hexagon's
+    vertices are computed once per view, and every colour is rendered once
+    into a tile surface, so painting a hex is a single blit. Callers set the
+    colour of each cell with ``set``; ``draw`` blits the cells that changed
+    since the last frame and returns their rectangles for
+    pygame.display.update. Colours live only in the view, never in the grid.
+    """
+
+    def __init__(self, grid, hex_size):
+        self.grid = grid
+        corners = [(hex_size * math.cos(math.radians(60 * i + 90)), hex_size * math.sin(math.radians(60 * i + 90)))
+                   for i in range(6)]
+        half_w = math.ceil(max(x for x, _ in corners))
+        half_h = math.ceil(hex_size)
+        self.points = [(half_w + x, half_h + y) for x, y in corners]
+        self.tile_size = (2 * half_w + 1, 2 * half_h + 1)
+        self.tiles = {}
+        # Top-left corner of each cell's tile, in the layout the board has always used
+        self.rects = []
+        for i in range(grid.size):
+            x, y = grid.coords(i)
+            offset = 0 if y % 2 == 0 else hex_size * 0.9
+            cx = offset + hex_size * 1.5 + x * hex_size * 1.76
+            cy = hex_size * 2 + y * hex_size * 1.5
+            self.rects.append(pygame.Rect(round(cx) - half_w, round(cy) - half_h, *self.tile_size))
+        self.reset()
+
+    def reset(self):
+        # Forget what is on screen; the next draw repaints every cell that was set
+        self.colors = [None] * self.grid.size
+        self.drawn = [None] * self.grid.size
+        self.dirty = set()
+
+    def tile(self, color):
+        tile = self.tiles.get(color)
+        if tile is None:
+            tile = self.tiles[color] = pygame.Surface(self.tile_size, pygame.SRCALPHA)
+            pygame.draw.polygon(tile, color, self.points)
+            pygame.draw.polygon(tile, BLACK, self.points, 1)
+        return tile
+
+    def set(self, i, color):
+        self.colors[i] = color
+        self.dirty.add(i)
+
+    def draw(self, surface):
+        colors = self.colors
+        drawn = self.drawn
+        rects = self.rects
+        changed = []
+        for i in self.dirty:
+            color = colors[i]
+            if color != drawn[i]:
+                drawn[i] = color
+                surface.blit(self.tile(color), rects[i])
+                changed.append(rects[i])
+        self.dirty.clear()
+        return changed
 
 # Initialize Pygame
 pygame.init()
 
-SLEEP_TIME = 0.05
+SLEEP_TIME = 0.05  # Per frame
+ALGORITHM = "astar"  # Search algorithm: "astar" or "bidirectional" (jps raises ValueError on hex grids)
+STEPS_PER_FRAME = 1  # Expansions run between two frames (None for no limit)
+FRAME_TIME = None  # Seconds of search between two frames (None for no limit)
+FPS = None  # Frame rate cap (see frame_budget.py)
+STATS_FILE = None  # Write the statistics of every search to this .csv or .jsonl file as it finishes (see instrument.py)
+BOARDS = None  # Number of boards to solve before exiting (None runs forever)
+SOAK_LOG = 0  # Print boards/s, average expansions and memory use every this many seconds (0 disables; see soak.py)
 
 # Constants
 WIDTH = 800
 HEIGHT = 800
-HEX_SIZE = 30
+HEX_SIZE = 30  # Lower it together with raising ROWS and COLS for larger boards
 ROWS = 16
 COLS = 14
+WALLS = 75  # Random walls per board
 WINDOW = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Hexagonal Grid")
 
+GRID = CompactHexGrid(COLS, ROWS)
+VIEW = HexView(GRID, HEX_SIZE)
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -60,101 +108,79 @@ GREEN = (0, 255, 0)
 YELLOW = (255, 255, 0)
 ORANGE = (255, 165, 0)
 
-# Function to draw the grid and update the colors of hexagons
-def draw_grid(hexagons, start, end, path, visited_cells):
-    WINDOW.fill(BLACK)
-    
-    for cell in visited_cells:
-        hexagons[cell[0]][cell[1]].color = RED
-    for cell in path:
-        hexagons[cell[0]][cell[1]].color = BLUE
-    hexagons[start[0]][start[1]].color = YELLOW
-    hexagons[end[0]][end[1]].color = ORANGE
-    for row in hexagons:
-        for hexagon in row:
-            hexagon.draw()
-
-# Heuristic function for A* algorithm
-def calculate_heuristic(x, y, end):
-    return abs(end[0] - x) + abs(end[1] - y)
-
-# Function to renew the hexagons grid
-def renew_hexagons():
-    hexagons = []
-    for x in range(COLS):
-        tmp = []
-        for y in range(ROWS):
-            tmp.append(Hexagon(x, y, HEX_SIZE))
-        hexagons.append(tmp)
-    return hexagons
-
-# A* pathfinding algorithm
-def a_star(start, end):
-    
-    hexagons = renew_hexagons()
-
-    path_found = True
+def check_quit():
+    # Pygame event handler
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
 
-    visited_cells = set()
+# A* pathfinding algorithm: solve one board and return the path
+def a_star(start, end, stats=None):
+    
+    # Clear the grid with one buffer fill instead of rebuilding it
+    GRID.fill()
+    start = GRID.index(*start)
+    end = GRID.index(*end)
 
     # Add random walls to the grid
-    for i in range(75):
-        x = random.randint(0, COLS - 1)
-        y = random.randint(0, ROWS - 1)
-        if (x, y) == start or (x, y) == end: continue
-        hexagons[x][y].wall = True
-
-    # Get neighbors for each hexagon
-    for x in range(COLS):
-        for y in range(ROWS):
-            hexagons[x][y].get_neigbors()
-
-    # Priority queue for A* algorithm
-    q = [(calculate_heuristic(start[0], start[1], end), 0, start[0], start[1], [(start[0], start[1])])]
-    g_scores = {start: 0}
-
-    while q:
+    for x, y in random_walls(COLS, ROWS, WALLS):
+        i = GRID.index(x, y)
+        if i != start and i != end:
+            GRID.set_wall(i)
+
+    # Paint the whole board once; the search then only recolours what it touches
+    WINDOW.fill(BLACK)
+    VIEW.reset()
+    for i in range(GRID.size):
+        VIEW.set(i, BLACK if GRID.is_wall(i) else WHITE)
+    VIEW.set(start, YELLOW)
+    VIEW.set(end, ORANGE)
+    pygame.display.update(VIEW.draw(WINDOW))
+
+    budget = FrameBudget(STEPS_PER_FRAME, FRAME_TIME, FPS)
+    seen = {}
+    shown = []  # path drawn in the last frame
+
+    def show_path(path):
+        nonlocal shown
+        # The previous path goes back to visited, then the current one is drawn over it
+        for i in shown:
+            VIEW.set(i, RED)
+        shown = path
+        for i in shown:
+            VIEW.set(i, BLUE)
+        VIEW.set(start, YELLOW)
+        VIEW.set(end, ORANGE)
+        pygame.display.update(VIEW.draw(WINDOW))
+
+    def on_expand(current, came_from):
+        for i in opened_since(came_from, seen):
+            VIEW.set(i, RED)
+        if not budget.step():
+            return
         sleep(SLEEP_TIME)
+        check_quit()
+        show_path(reconstruct_path(came_from, current))
+        budget.wait()
+
+    # Hex distance is exact on open ground, so the bucket list's preference for
+    # the larger g among equal f walks straight to the goal instead of widening
+    path = SOLVERS[ALGORITHM](GRID, start, end, on_expand, stats, open_list=BucketOpenList)
 
-        # Pygame event handler
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-        
-        f_score, g_score, x, y, path = heapq.heappop(q)
-        current = (x, y)
-
-        draw_grid(hexagons, start, end, path, visited_cells)
-        pygame.display.update()
-
-        if current == end: return
-
-        for nx, ny in hexagons[x][y].directions:
-            neighbor = (nx, ny)
-            if nx < 0 or nx >= COLS or ny < 0 or ny >= ROWS: continue
-            if neighbor in visited_cells: continue
-            if hexagons[nx][ny].wall: continue
-            if neighbor in path: continue
-
-            tentative_g_score = g_score + 1
-            if neighbor not in g_scores or tentative_g_score < g_scores[neighbor]:
-                g_scores[neighbor] = tentative_g_score
-                f_score = tentative_g_score + calculate_heuristic(nx, ny, end)
-                heapq.heappush(q, (f_score, tentative_g_score, nx, ny, path + [neighbor]))
-                visited_cells.add(neighbor)
-    else:
-        path_found = False
-    visited_cells.clear()
-
-    if path_found: sleep(1)
+    if path is not None:
+        # The frame of the last expansion may have been skipped
+        show_path(path)
+        sleep(1)
+    return path
+
+def run(start, end, boards=None):
+    # Solve ``boards`` boards one after another (None for no end)
+    run_boards(lambda stats: a_star(start, end, stats), boards, SOAK_LOG, STATS_FILE, check_quit,
+               algorithm=ALGORITHM, rows=ROWS, cols=COLS)
 
 # Main function to run the A* algorithm
 if __name__ == "__main__":
     start = (0, 0)
     end = (COLS - 1, ROWS - 1)
-
-    visited_cells = set()
-
-    while True:
-        a_star(start, end)
\ No newline at end of file
+    run(start, end, BOARDS)
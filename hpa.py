@@ -0,0 +1,292 @@
+"""
+Hierarchical pathfinding (HPA*) on a 4-connected CompactGrid.
+
+The grid is cut into square clusters. Wherever two neighbouring clusters
+share a run of free cells across their border, one transition (two for
+long runs, at its ends) links a cell on each side; these entrance cells
+are the nodes of an abstract graph. Inside every cluster the distances
+between its entrances are precomputed with a BFS that stays inside the
+cluster, so a query only has to:
+  1. connect the start and goal to the entrances of their own clusters,
+  2. run astar.solve on the small abstract graph,
+  3. refine each abstract edge into cells, reusing the cached in-cluster
+     paths between entrances.
+
+Paths are near-optimal rather than shortest: they pass through the chosen
+entrance cells. After toggling walls in the grid, ``update(changed)``
+recomputes only the borders and clusters those cells touch.
+
+Running this module compares HPA* queries with plain A* on a large maze:
+    python hpa.py [size] [queries] [cluster_size]
+"""
+
+import random
+import sys
+import time
+from collections import deque
+
+from astar import SearchStats, solve
+from compact_grid import WALL
+from maze_gen import backtracking
+from open_list import HeapOpenList
+
+# Runs of free border cells at least this long get a transition at each end
+LONG_ENTRANCE = 6
+
+
+class _AbstractGraph:
+    """Grid-protocol view of the entrance graph plus the query's start and goal."""
+
+    def __init__(self, hpa, start, goal, start_edges, goal_edges):
+        graph = hpa.graph
+        self.graph = graph
+        self.heuristic = hpa.grid.heuristic
+        # The start and the entrances that reach the goal get a copy of their
+        # edges with the query's own edges added; the shared graph is untouched
+        overlay = {start: {**graph.get(start, {}), **start_edges}}
+        overlay[start].pop(start, None)
+        for node, d in goal_edges.items():
+            if node != goal:
+                edges = overlay.get(node)
+                if edges is None:
+                    edges = overlay[node] = dict(graph.get(node, {}))
+                edges[goal] = d
+        self.overlay = overlay
+
+    def edges(self, node):
+        edges = self.overlay.get(node)
+        if edges is None:
+            return self.graph.get(node, {})
+        return edges
+
+    def neighbors(self, node):
+        return self.edges(node)
+
+    def cost(self, a, b):
+        return self.edges(a)[b]
+
+
+class HPAStar:
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.clusters_x = -(-grid.width // cluster_size)
+        self.clusters_y = -(-grid.height // cluster_size)
+        self.borders = {}  # (cluster, "E" or "S") -> [(cell, cell across the border)]
+        self.inter = {}    # entrance -> set of entrances across a border
+        self.intra = {}    # cluster -> {entrance: {entrance: distance inside the cluster}}
+        self.graph = {}    # entrance -> {entrance: cost}, the intra and inter edges together
+        self._paths = {}   # cluster -> {(a, b): cached cell path from a to b}
+        clusters = range(self.clusters_x * self.clusters_y)
+        for c in clusters:
+            for side in "ES":
+                self._build_border(c, side)
+        for c in clusters:
+            self._build_cluster(c)
+
+    def cluster_of(self, i):
+        y, x = divmod(i, self.grid.width)
+        return (y // self.cluster_size) * self.clusters_x + x // self.cluster_size
+
+    def _bounds(self, c):
+        cy, cx = divmod(c, self.clusters_x)
+        s = self.cluster_size
+        return cx * s, cy * s, min((cx + 1) * s, self.grid.width), min((cy + 1) * s, self.grid.height)
+
+    def _build_border(self, c, side):
+        key = (c, side)
+        for a, b in self.borders.pop(key, ()):
+            self.inter[a].discard(b)
+            self.inter[b].discard(a)
+        cy, cx = divmod(c, self.clusters_x)
+        if (side == "E" and cx + 1 >= self.clusters_x) or (side == "S" and cy + 1 >= self.clusters_y):
+            return
+        w = self.grid.width
+        cells = self.grid.cells
+        x0, y0, x1, y1 = self._bounds(c)
+        # Pairs of cells facing each other across the border, in order along it
+        if side == "E":
+            pairs = [(y * w + x1 - 1, y * w + x1) for y in range(y0, y1)]
+        else:
+            pairs = [((y1 - 1) * w + x, y1 * w + x) for x in range(x0, x1)]
+
+        transitions = []
+        run = []
+        # A trailing (-1, -1) pair closes the last run
+        for a, b in pairs + [(-1, -1)]:
+            if a >= 0 and not cells[a] & WALL and not cells[b] & WALL:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) >= LONG_ENTRANCE:
+                    transitions += [run[0], run[-1]]
+                else:
+                    transitions.append(run[len(run) // 2])
+                run = []
+        self.borders[key] = transitions
+        for a, b in transitions:
+            self.inter.setdefault(a, set()).add(b)
+            self.inter.setdefault(b, set()).add(a)
+
+    def _entrances(self, c):
+        # Entrance cells of cluster ``c``, from its own borders and those of its west and north neighbours
+        cx = c % self.clusters_x
+        result = set()
+        for a, _ in self.borders.get((c, "E"), ()):
+            result.add(a)
+        for a, _ in self.borders.get((c, "S"), ()):
+            result.add(a)
+        if cx > 0:
+            for _, b in self.borders.get((c - 1, "E"), ()):
+                result.add(b)
+        if c >= self.clusters_x:
+            for _, b in self.borders.get((c - self.clusters_x, "S"), ()):
+                result.add(b)
+        return result
+
+    def _bfs(self, c, source, targets):
+        # Distance from ``source`` to each reachable cell of ``targets`` without leaving cluster ``c``
+        x0, y0, x1, y1 = self._bounds(c)
+        w = self.grid.width
+        neighbors = self.grid.neighbors
+        dist = {source: 0}
+        found = {}
+        queue = deque([source])
+        while queue and len(found) < len(targets):
+            i = queue.popleft()
+            if i in targets:
+                found[i] = dist[i]
+            d = dist[i] + 1
+            for j in neighbors(i):
+                if j not in dist:
+                    y, x = divmod(j, w)
+                    if x0 <= x < x1 and y0 <= y < y1:
+                        dist[j] = d
+                        queue.append(j)
+        return found
+
+    def _build_cluster(self, c):
+        # Called once the borders are up to date, so the inter edges are final
+        graph = self.graph
+        for a in self.intra.get(c, ()):
+            del graph[a]
+        entrances = self._entrances(c)
+        intra = self.intra[c] = {}
+        for a in entrances:
+            intra[a] = {b: d for b, d in self._bfs(c, a, entrances).items() if b != a}
+            edges = graph[a] = dict(intra[a])
+            for b in self.inter[a]:
+                edges[b] = 1
+        self._paths[c] = {}
+
+    def update(self, changed):
+        """Repair the abstraction after the walls of the ``changed`` cells were toggled in the grid."""
+        w = self.grid.width
+        s = self.cluster_size
+        dirty_borders = set()
+        dirty_clusters = set()
+        for i in changed:
+            c = self.cluster_of(i)
+            dirty_clusters.add(c)
+            y, x = divmod(i, w)
+            # Cells on a cluster edge can change the transitions of that border
+            if x % s == s - 1 and x + 1 < w:
+                dirty_borders.add((c, "E"))
+            if x % s == 0 and x > 0:
+                dirty_borders.add((c - 1, "E"))
+            if y % s == s - 1 and y + 1 < self.grid.height:
+                dirty_borders.add((c, "S"))
+            if y % s == 0 and y > 0:
+                dirty_borders.add((c - self.clusters_x, "S"))
+        for c, side in dirty_borders:
+            self._build_border(c, side)
+            dirty_clusters.add(c)
+            dirty_clusters.add(c + 1 if side == "E" else c + self.clusters_x)
+        for c in dirty_clusters:
+            self._build_cluster(c)
+
+    def _local_path(self, c, a, b):
+        # Shortest path from a to b inside cluster c
+        x0, y0, x1, y1 = self._bounds(c)
+        w = self.grid.width
+        neighbors = self.grid.neighbors
+        came_from = {a: None}
+        queue = deque([a])
+        while queue:
+            i = queue.popleft()
+            if i == b:
+                break
+            for j in neighbors(i):
+                if j not in came_from:
+                    y, x = divmod(j, w)
+                    if x0 <= x < x1 and y0 <= y < y1:
+                        came_from[j] = i
+                        queue.append(j)
+        path = [b]
+        while path[-1] != a:
+            path.append(came_from[path[-1]])
+        path.reverse()
+        return path
+
+    def find_path(self, start, goal, stats=None, open_list=HeapOpenList):
+        """
+        Path from ``start`` to ``goal`` as a list of cell indices, or None.
+        ``stats`` and ``open_list`` are passed to the abstract search.
+        """
+        cells = self.grid.cells
+        if cells[start] & WALL or cells[goal] & WALL:
+            return None
+        if start == goal:
+            return [start]
+        cs = self.cluster_of(start)
+        cg = self.cluster_of(goal)
+        entrances = set(self.intra[cs])
+        if cs == cg:
+            entrances.add(goal)
+        start_edges = self._bfs(cs, start, entrances)
+        goal_edges = self._bfs(cg, goal, set(self.intra[cg]))
+        graph = _AbstractGraph(self, start, goal, start_edges, goal_edges)
+        abstract = solve(graph, start, goal, stats=stats, open_list=open_list)
+        if abstract is None:
+            return None
+
+        path = [start]
+        for a, b in zip(abstract, abstract[1:]):
+            c = self.cluster_of(a)
+            if c != self.cluster_of(b):
+                path.append(b)
+                continue
+            if a == start or b == goal:
+                segment = self._local_path(c, a, b)
+            else:
+                cache = self._paths[c]
+                segment = cache.get((a, b))
+                if segment is None:
+                    segment = cache[(a, b)] = self._local_path(c, a, b)
+            path += segment[1:]
+        return path
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    cluster_size = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    rng = random.Random(0)
+    maze = backtracking(size, size, seed=0)
+    t0 = time.perf_counter()
+    hpa = HPAStar(maze, cluster_size)
+    print(f"{size}x{size} maze, {cluster_size}x{cluster_size} clusters: abstraction built in {time.perf_counter() - t0:.2f}s, "
+          f"{len(hpa.graph)} entrances")
+
+    rooms = [maze.index(x, y) for y in range(0, size, 2) for x in range(0, size, 2)]
+    pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(queries)]
+    for label, query in (("A*", lambda s, e, st: solve(maze, s, e, stats=st)),
+                         ("HPA*", lambda s, e, st: hpa.find_path(s, e, st))):
+        stats = SearchStats()
+        length = 0
+        t0 = time.perf_counter()
+        for s, e in pairs:
+            length += len(query(s, e, stats)) - 1
+        elapsed = time.perf_counter() - t0
+        print(f"  {label:>4}: {elapsed * 1000 / queries:8.2f} ms per query, "
+              f"{stats.expansions / queries:9.1f} expansions, total length {length}")
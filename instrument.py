@@ -0,0 +1,90 @@
+"""
+Per-query collection and export of search statistics.
+
+A QueryLog hands out one astar.SearchStats per query and keeps them with
+whatever describes the query (solver, board, endpoints...):
+
+    log = QueryLog()
+    path = solve(grid, start, goal, stats=log.new(solver="astar", size=grid.width))
+    ...
+    log.save("queries.csv")   # or .json
+
+Rows are plain dicts of the description followed by SearchStats.FIELDS,
+so comparing search_time with render_time tells whether a slow run is
+spent searching or drawing.
+
+A QueryLog keeps every query until it is saved. Front-ends that run board
+after board for as long as they are left open stream the rows instead,
+with a QueryWriter that appends each query to the file as it finishes.
+"""
+
+import csv
+import json
+
+from astar import SearchStats
+
+
+class QueryLog:
+    def __init__(self):
+        self.queries = []  # (description, SearchStats)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def new(self, **info):
+        """Return a fresh SearchStats for one query, recorded with ``info``."""
+        stats = SearchStats()
+        self.queries.append((info, stats))
+        return stats
+
+    def rows(self):
+        return [{**info, **stats.as_dict()} for info, stats in self.queries]
+
+    def totals(self):
+        """One SearchStats-like dict summing every query (max_open is the largest)."""
+        total = dict.fromkeys(SearchStats.FIELDS, 0)
+        for _, stats in self.queries:
+            for name, value in stats.as_dict().items():
+                total[name] = max(total[name], value) if name == "max_open" else total[name] + value
+        return total
+
+    def save(self, path):
+        """Write every query to ``path``, as CSV if it ends in .csv and JSON otherwise."""
+        rows = self.rows()
+        with open(path, "w", newline="") as f:
+            if path.endswith(".csv"):
+                fields = []
+                for row in rows:
+                    fields += [name for name in row if name not in fields]
+                writer = csv.DictWriter(f, fields)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump(rows, f, indent=1)
+
+
+class QueryWriter:
+    """
+    Writes one row per query to ``path`` as soon as it is done: CSV if the
+    path ends in .csv (with the columns of the first row), JSON lines
+    otherwise. Nothing is kept in memory.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.csv = path.endswith(".csv")
+        self.writer = None
+
+    def write(self, stats, **info):
+        row = {**info, **stats.as_dict()}
+        if self.csv:
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.file, list(row))
+                self.writer.writeheader()
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,244 @@
+"""
+Jump Point Search on uniform-cost compact square grids.
+
+solve_jps has the same signature and result as astar.solve, but only
+expands jump points: straight runs of cells with no forced neighbours are
+skipped over in a single step instead of being pushed onto the heap one by
+one. It works on a CompactGrid (4-connected) or a DiagonalGrid
+(8-connected, no corner cutting) and returns the full cell-by-cell path.
+
+On 4-connected grids vertical moves play the role diagonals play in the
+classic algorithm: a vertical jump stops wherever a horizontal scan from
+the cell finds the goal or a forced neighbour, and horizontal jumps only
+turn at forced neighbours.
+
+Running this module compares plain A* and JPS on the random boards that
+squares.py and procedural_maze_gen.add_random_walls produce:
+    python jps.py [runs]
+"""
+
+import random
+import sys
+import time
+
+from astar import COLS, MAX_BLOCKS, MIN_BLOCKS, ROWS, SearchStats, random_walls, reconstruct_path, solve
+from compact_grid import SQRT2, WALL, CompactGrid, DiagonalGrid
+from open_list import HeapOpenList
+
+ORTHOGONAL = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+DIAGONAL = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+
+def _sign(d):
+    return (d > 0) - (d < 0)
+
+
+# Expand a list of jump points into every cell along the straight or diagonal segments
+def _fill_path(jump_points, width):
+    path = [jump_points[0]]
+    for a, b in zip(jump_points, jump_points[1:]):
+        ay, ax = divmod(a, width)
+        by, bx = divmod(b, width)
+        step = _sign(by - ay) * width + _sign(bx - ax)
+        for _ in range(max(abs(bx - ax), abs(by - ay))):
+            a += step
+            path.append(a)
+    return path
+
+
+def solve_jps(grid, start, goal, on_expand=None, stats=None, open_list=HeapOpenList):
+    """
+    Find a shortest path from ``start`` to ``goal`` with Jump Point Search.
+
+    Arguments and result match astar.solve. ``on_expand`` sees ``came_from``
+    linking jump points, so the live path is drawn through them. Raises
+    ValueError for a grid that is not a compact square grid, such as a hex
+    grid, where the jumps would return wrong paths.
+    """
+    if not getattr(grid, 'square', False):
+        raise ValueError("jump point search needs a CompactGrid or a DiagonalGrid")
+    if stats is not None:
+        on_expand = stats.begin(on_expand)
+    w = grid.width
+    h = grid.height
+    cells = grid.cells
+    diagonal = grid.diagonal
+    heuristic = grid.heuristic
+    gy, gx = divmod(goal, w)
+
+    def free(x, y):
+        return 0 <= x < w and 0 <= y < h and not cells[y * w + x] & WALL
+
+    def jump_straight(x, y, dx, dy):
+        # Walk in a straight line until the goal, a wall or a forced neighbour
+        while True:
+            x += dx
+            y += dy
+            if not free(x, y):
+                return None
+            if x == gx and y == gy:
+                return x, y
+            if dx:
+                if (free(x, y - 1) and not free(x - dx, y - 1)) or (free(x, y + 1) and not free(x - dx, y + 1)):
+                    return x, y
+            elif diagonal:
+                if (free(x - 1, y) and not free(x - 1, y - dy)) or (free(x + 1, y) and not free(x + 1, y - dy)):
+                    return x, y
+            elif jump_straight(x, y, 1, 0) is not None or jump_straight(x, y, -1, 0) is not None:
+                # 4-connected vertical move: stop where a horizontal run finds something
+                return x, y
+
+    def jump_diagonal(x, y, dx, dy):
+        while True:
+            x += dx
+            y += dy
+            if not free(x, y):
+                return None
+            if x == gx and y == gy:
+                return x, y
+            if jump_straight(x, y, dx, 0) is not None or jump_straight(x, y, 0, dy) is not None:
+                return x, y
+            if not (free(x + dx, y) and free(x, y + dy)):
+                return None
+
+    def directions(x, y, dx, dy):
+        if dx == 0 and dy == 0:
+            if not diagonal:
+                return ORTHOGONAL
+            result = list(ORTHOGONAL)
+            for ddx, ddy in DIAGONAL:
+                if free(x + ddx, y) and free(x, y + ddy):
+                    result.append((ddx, ddy))
+            return result
+        if not diagonal:
+            if dy:
+                return [(0, dy), (1, 0), (-1, 0)]
+            result = [(dx, 0)]
+            for sy in (-1, 1):
+                if free(x, y + sy) and not free(x - dx, y + sy):
+                    result.append((0, sy))
+            return result
+        if dx and dy:
+            result = []
+            vertical = free(x, y + dy)
+            horizontal = free(x + dx, y)
+            if vertical:
+                result.append((0, dy))
+            if horizontal:
+                result.append((dx, 0))
+            if vertical and horizontal:
+                result.append((dx, dy))
+            return result
+        # Straight move on an 8-connected grid: swap axes so one rule covers both
+        if dx:
+            ahead = free(x + dx, y)
+            sides = [(0, s) for s in (-1, 1) if free(x, y + s)]
+            result = [(dx, 0)] if ahead else []
+            if ahead:
+                result += [(dx, sy) for _, sy in sides]
+        else:
+            ahead = free(x, y + dy)
+            sides = [(s, 0) for s in (-1, 1) if free(x + s, y)]
+            result = [(0, dy)] if ahead else []
+            if ahead:
+                result += [(sx, dy) for sx, _ in sides]
+        return result + sides
+
+    open_set = open_list()
+    push = open_set.push
+    pop = open_set.pop
+    push(heuristic(start, goal), 0, start)
+    came_from = {}
+    g_scores = {start: 0}
+    closed = set()
+    expansions = pushes = pops = peak = 0
+    track_peak = stats is not None
+    reconstruct_time = 0.0
+
+    path = None
+    while open_set:
+        _, g, current = pop()
+        pops += 1
+        if current in closed:
+            continue
+        if on_expand is not None:
+            on_expand(current, came_from)
+        if current == goal:
+            t0 = time.perf_counter()
+            path = _fill_path(reconstruct_path(came_from, current), w)
+            reconstruct_time = time.perf_counter() - t0
+            break
+        closed.add(current)
+        expansions += 1
+
+        cy, cx = divmod(current, w)
+        parent = came_from.get(current)
+        if parent is None:
+            dx = dy = 0
+        else:
+            py, px = divmod(parent, w)
+            dx = _sign(cx - px)
+            dy = _sign(cy - py)
+
+        for ddx, ddy in directions(cx, cy, dx, dy):
+            if ddx and ddy:
+                point = jump_diagonal(cx, cy, ddx, ddy)
+            else:
+                point = jump_straight(cx, cy, ddx, ddy)
+            if point is None:
+                continue
+            jx, jy = point
+            neighbor = jy * w + jx
+            if neighbor in closed:
+                continue
+            dist_x = abs(jx - cx)
+            dist_y = abs(jy - cy)
+            if diagonal and dist_x and dist_y:
+                tentative_g = g + SQRT2 * dist_x
+            else:
+                tentative_g = g + dist_x + dist_y
+            if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                came_from[neighbor] = current
+                push(tentative_g + heuristic(neighbor, goal), tentative_g, neighbor)
+                pushes += 1
+        if track_peak and pushes - pops > peak:
+            peak = pushes - pops
+
+    if stats is not None:
+        stats.end(expansions, pushes, pops, len(g_scores) - 1, path is not None, peak + 1, reconstruct_time)
+    return path
+
+
+# Cost of a path returned by a solver, using the grid's step costs
+def path_cost(grid, path):
+    cost = getattr(grid, 'cost', None)
+    if cost is None:
+        return len(path) - 1
+    return sum(cost(a, b) for a, b in zip(path, path[1:]))
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(0)
+    for grid_type in (CompactGrid, DiagonalGrid):
+        astar_stats = SearchStats()
+        jps_stats = SearchStats()
+        solved = 0
+        for _ in range(runs):
+            start, end = (0, 0), (COLS - 1, ROWS - 1)
+            walls = random_walls(COLS, ROWS, rng.randint(MIN_BLOCKS, MAX_BLOCKS), (start, end), rng)
+            grid = grid_type.from_walls(COLS, ROWS, walls)
+            s, e = grid.index(*start), grid.index(*end)
+            expected = solve(grid, s, e, stats=astar_stats)
+            path = solve_jps(grid, s, e, stats=jps_stats)
+            assert (expected is None) == (path is None)
+            if path is not None:
+                assert abs(path_cost(grid, path) - path_cost(grid, expected)) < 1e-9
+                solved += 1
+        name = "8-connected" if grid_type.diagonal else "4-connected"
+        print(f"{name}: {runs} boards ({COLS}x{ROWS}, {MIN_BLOCKS}-{MAX_BLOCKS} walls), {solved} solvable, same path costs")
+        for label, attr in (("expansions", "expansions"), ("heap ops", "heap_ops")):
+            a = getattr(astar_stats, attr) / runs
+            j = getattr(jps_stats, attr) / runs
+            print(f"  {label:>10}: A* {a:8.1f}  JPS {j:8.1f}  saved {a - j:8.1f} ({(a - j) * 100 / a:.0f}%)")
@@ -0,0 +1,234 @@
+"""
+Landmark (ALT) heuristic for repeated queries on a fixed map.
+
+Manhattan distance is a weak bound in perfect mazes, where the walking
+distance between two cells is many times larger. ALT preprocesses the map
+once: it picks K landmark cells and stores the BFS distance from each of
+them to every cell. By the triangle inequality, for any landmark L
+
+    dist(a, b) >= |dist(L, a) - dist(L, b)|
+
+so the largest of these over the landmarks (and the grid's own heuristic)
+is an admissible and consistent heuristic. LandmarkGrid wraps a grid with
+it, and since the solvers only call ``grid.heuristic`` they all use it
+unchanged:
+
+    landmarks = Landmarks.build(grid, k=8)
+    path = solve(LandmarkGrid(grid, landmarks), start, goal)
+
+Landmarks are chosen by farthest-point selection, each one as far as
+possible from the ones already picked, which puts them on the edges of the
+map where they bound the most pairs. Distances are kept in one flat
+array('i'), the K distances of a cell next to each other; cells a landmark
+cannot reach hold -1. Tables only fit unit-cost grids (CompactGrid and the
+hex grid), and are only valid while the walls do not change.
+
+save_landmarks writes the tables next to a map file with a checksum of its
+walls, so load_landmarks refuses tables computed for another map. Running
+this module builds (or loads) the tables of a map file and compares A*
+with and without them:
+    python landmarks.py big.map [-k 8] [--queries 100]
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+from array import array
+from collections import deque
+from operator import sub
+
+from astar import SearchStats, solve
+from compact_grid import KEEP_WALLS, WALL
+from map_file import load_map
+
+MAGIC = b"ALMK"
+VERSION = 1
+# magic, version, landmark count, width, height, crc32 of the wall plane
+HEADER = struct.Struct("<4sBxxxIIII")
+
+
+def _walls_crc(grid):
+    return zlib.crc32(bytes(grid.cells).translate(KEEP_WALLS))
+
+
+def _bfs(grid, source):
+    # Distance from ``source`` to every cell, -1 where it cannot reach
+    dist = array('i', [-1]) * grid.size
+    dist[source] = 0
+    neighbors = grid.neighbors
+    queue = deque([source])
+    while queue:
+        i = queue.popleft()
+        d = dist[i] + 1
+        for j in neighbors(i):
+            if dist[j] < 0:
+                dist[j] = d
+                queue.append(j)
+    return dist
+
+
+class Landmarks:
+    """Distance tables from ``landmarks`` (cell indices); ``table[i * k + j]`` is the distance from landmark j to cell i."""
+
+    def __init__(self, grid, landmarks, table):
+        self.grid = grid
+        self.landmarks = list(landmarks)
+        self.k = len(self.landmarks)
+        self.table = table
+
+    @classmethod
+    def build(cls, grid, k=8, seed=None):
+        """Pick ``k`` landmarks on ``grid`` and compute their tables."""
+        if getattr(grid, 'cost', None) is not None:
+            raise ValueError("landmark tables need a unit-cost grid")
+        cells = grid.cells
+        free = [i for i in range(grid.size) if not cells[i] & WALL]
+        if not free:
+            raise ValueError("grid has no free cells")
+        rng = random.Random(seed)
+        # The first landmark is the cell farthest from a random one, the
+        # next ones the cells farthest from every landmark picked so far
+        dist = _bfs(grid, rng.choice(free))
+        nearest = array('i', [-1]) * grid.size
+        landmarks = []
+        distances = []
+        for _ in range(min(k, len(free))):
+            if landmarks:
+                for i in free:
+                    d = dist[i]
+                    if d >= 0 and (nearest[i] < 0 or d < nearest[i]):
+                        nearest[i] = d
+                source = max(free, key=nearest.__getitem__)
+            else:
+                source = max(free, key=dist.__getitem__)
+            if source in landmarks:
+                break
+            landmarks.append(source)
+            dist = _bfs(grid, source)
+            distances.append(dist)
+
+        k = len(landmarks)
+        table = array('i', [-1]) * (grid.size * k)
+        for j, dist in enumerate(distances):
+            table[j::k] = dist
+        return cls(grid, landmarks, table)
+
+    def heuristic(self, a, b):
+        # A landmark gives -1 to every cell of a component it cannot reach, so
+        # only pairs in different components, with no path anyway, get overestimated
+        k = self.k
+        table = self.table
+        a *= k
+        b *= k
+        return max(map(abs, map(sub, table[a:a + k], table[b:b + k])))
+
+
+class LandmarkGrid:
+    """View of ``grid`` whose heuristic is the larger of its own and the landmark bound."""
+
+    def __init__(self, grid, landmarks):
+        self._grid = grid
+        self._base = grid.heuristic
+        self._alt = landmarks.heuristic
+
+    def __getattr__(self, name):
+        # Everything but the heuristic comes from the wrapped grid
+        return getattr(self._grid, name)
+
+    def heuristic(self, a, b):
+        h = self._alt(a, b)
+        base = self._base(a, b)
+        return base if base > h else h
+
+
+def landmarks_path(map_path):
+    return map_path + ".alt"
+
+
+def save_landmarks(path, landmarks):
+    grid = landmarks.grid
+    header = HEADER.pack(MAGIC, VERSION, landmarks.k, grid.width, grid.height, _walls_crc(grid))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(array('i', landmarks.landmarks).tobytes())
+        f.write(landmarks.table.tobytes())
+
+
+def load_landmarks(path, grid):
+    """
+    Map the tables in ``path`` for ``grid`` into memory. Raises ValueError if
+    the file is not a landmark file or was computed for other walls.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < HEADER.size:
+        raise ValueError(f"{path}: not a landmark file")
+    magic, version, k, width, height, crc = HEADER.unpack_from(mm)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a landmark file")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported landmark version {version}")
+    if (width, height) != (grid.width, grid.height) or crc != _walls_crc(grid):
+        raise ValueError(f"{path}: tables were computed for another map")
+    itemsize = array('i').itemsize
+    if len(mm) != HEADER.size + k * (1 + width * height) * itemsize:
+        raise ValueError(f"{path}: truncated landmark file")
+    data = memoryview(mm)[HEADER.size:].cast('i')
+    return Landmarks(grid, data[:k], data[k:])
+
+
+def landmarks_for(grid, k=8, map_path=None):
+    """
+    Landmarks for ``grid``, loaded from the tables saved next to ``map_path``
+    when they match it; otherwise they are built and, with a ``map_path``,
+    saved there for the next run.
+    """
+    if map_path is not None:
+        path = landmarks_path(map_path)
+        if os.path.exists(path):
+            try:
+                landmarks = load_landmarks(path, grid)
+                if landmarks.k == k:
+                    return landmarks
+            except ValueError:
+                pass
+    landmarks = Landmarks.build(grid, k)
+    if map_path is not None:
+        save_landmarks(landmarks_path(map_path), landmarks)
+    return landmarks
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the landmark tables of a map file and compare A* with them.")
+    parser.add_argument("map")
+    parser.add_argument("-k", type=int, default=8, help="number of landmarks")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grid, _ = load_map(args.map)
+    t0 = time.perf_counter()
+    landmarks = landmarks_for(grid, args.k, args.map)
+    print(f"{grid.width}x{grid.height}: {landmarks.k} landmarks ready in {time.perf_counter() - t0:.2f}s "
+          f"({landmarks_path(args.map)})")
+
+    rng = random.Random(args.seed)
+    cells = grid.cells
+    free = [i for i in range(grid.size) if not cells[i] & WALL]
+    pairs = [(rng.choice(free), rng.choice(free)) for _ in range(args.queries)]
+    alt_grid = LandmarkGrid(grid, landmarks)
+    lengths = {}
+    for label, g in (("A*", grid), ("ALT", alt_grid)):
+        stats = SearchStats()
+        t0 = time.perf_counter()
+        lengths[label] = [None if path is None else len(path) for path in
+                          (solve(g, s, e, stats=stats) for s, e in pairs)]
+        elapsed = time.perf_counter() - t0
+        print(f"  {label:>3}: {elapsed * 1000 / args.queries:8.2f} ms per query, "
+              f"{stats.expansions / args.queries:9.1f} expansions")
+    assert lengths["A*"] == lengths["ALT"]
+    print("  same path lengths")
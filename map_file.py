@@ -0,0 +1,107 @@
+"""
+Binary map files for compact grids.
+
+A map file is a 24-byte header followed by the wall plane, one byte per
+cell in row order (WALL or 0), which is exactly the layout of
+CompactGrid.cells. Header, little-endian:
+    magic    4s  b"AMAP"
+    version  B   1
+    topology B   0 square, 1 diagonal (8-connected), 2 hex
+    has_seed B   1 if the seed field is meaningful
+    (pad)    x
+    width    I
+    height   I
+    seed     q   seed the board was generated from
+
+load_map maps the file with mmap and hands the grid a memoryview of the
+wall plane, so opening a huge map costs nothing up front and the pages are
+shared read-only between processes that load the same file. The solvers
+only read ``cells``, so they run on the mapped buffer directly. Pass
+``writable=True`` for a private copy-on-write mapping when the caller sets
+search flags (as the visual front-ends do).
+
+Running this module writes a generated board to a map file:
+    python map_file.py big.map --board prim --size 4096 --seed 1
+"""
+
+import argparse
+import mmap
+import random
+import struct
+
+from astar import COLS, MAX_BLOCKS, MIN_BLOCKS, ROWS, random_walls
+from compact_grid import KEEP_WALLS, CompactGrid, CompactHexGrid, DiagonalGrid
+from maze_gen import GENERATORS
+
+MAGIC = b"AMAP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxIIq")
+
+TOPOLOGIES = [CompactGrid, DiagonalGrid, CompactHexGrid]
+
+
+def save_map(path, grid, seed=None):
+    """Write the walls of ``grid`` to ``path``; search flags are not saved."""
+    topology = TOPOLOGIES.index(type(grid))
+    header = HEADER.pack(MAGIC, VERSION, topology, seed is not None, grid.width, grid.height,
+                         0 if seed is None else seed)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(bytes(grid.cells).translate(KEEP_WALLS))
+
+
+def load_map(path, writable=False):
+    """
+    Map ``path`` into memory and return ``(grid, seed)``; seed is None if the
+    file has none. The grid's cells are a read-only view of the file unless
+    ``writable`` is set, in which case writes go to a private copy.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+    if len(mm) < HEADER.size:
+        raise ValueError(f"{path}: not a map file")
+    magic, version, topology, has_seed, width, height, seed = HEADER.unpack_from(mm)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a map file")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported map version {version}")
+    if topology >= len(TOPOLOGIES):
+        raise ValueError(f"{path}: unknown topology {topology}")
+    size = width * height
+    if len(mm) != HEADER.size + size:
+        raise ValueError(f"{path}: expected {size} cells, found {len(mm) - HEADER.size}")
+    cells = memoryview(mm)[HEADER.size:]
+    return TOPOLOGIES[topology](width, height, cells), seed if has_seed else None
+
+
+
+def free_corners(grid):
+    """
+    First and last free cell in row order, as (x, y): the top-left and
+    bottom-right corners of a board, or the nearest free cells when a wall
+    sits there. The front-ends use them as the endpoints of a loaded map.
+    """
+    walls = bytes(grid.cells).translate(KEEP_WALLS)
+    first = walls.find(0)
+    if first < 0:
+        raise ValueError("map has no free cells")
+    return grid.coords(first), grid.coords(walls.rfind(0))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a board and save it as a map file.")
+    parser.add_argument("out")
+    parser.add_argument("--board", choices=["random", *GENERATORS], default="random")
+    parser.add_argument("--size", type=int, default=COLS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    size = args.size
+    if args.board == "random":
+        # Same wall density as the squares.py boards
+        rng = random.Random(args.seed)
+        count = rng.randint(MIN_BLOCKS, MAX_BLOCKS) * size * size // (COLS * ROWS)
+        grid = CompactGrid.from_walls(size, size, random_walls(size, size, count, ((0, 0), (size - 1, size - 1)), rng))
+    else:
+        grid = GENERATORS[args.board](size, size, seed=args.seed)
+    save_map(args.out, grid, args.seed)
+    print(f"{args.board} {size}x{size} (seed {args.seed}) -> {args.out}")
@@ -0,0 +1,209 @@
+"""
+Headless maze generators that carve straight into a CompactGrid.
+
+Both generators start from grid_maze (rooms at even coordinates, walls at
+every odd row and column) and knock down the wall between two rooms to
+join them, the same mazes procedural_maze_gen draws:
+  - backtracking: depth-first search with a stack of flat indices, giving
+    long winding corridors
+  - prim: randomized Prim, opening the frontier room with the smallest
+    random priority from a heap
+  - eller: Eller's algorithm, which only keeps the current row of rooms
+    and so can stream mazes of any height (see eller_rows)
+
+Visited rooms are marked with the VISITED bit in the grid itself and the
+flags are cleared before returning, so there is no per-cell object or
+extra buffer. The output only depends on ``seed``. An optional
+``observer(maze, i)`` is called each time room ``i`` joins the maze, which
+is how the pygame front-end animates generation; without one nothing but
+the carving runs.
+
+Running this module times both generators:
+    python maze_gen.py [size]
+"""
+
+import heapq
+import random
+import sys
+import time
+
+from compact_grid import VISITED, WALL, CompactGrid
+
+
+def grid_maze(width, height):
+    # Walls on every odd column and row: a full wall row alternates with a
+    # row of rooms separated by walls
+    maze = CompactGrid(width, height)
+    open_row = bytes(WALL if x % 2 == 1 else 0 for x in range(width))
+    wall_row = bytes((WALL,)) * width
+    maze.cells[:] = b"".join(wall_row if y % 2 == 1 else open_row for y in range(height))
+    return maze
+
+
+def backtracking(width, height, start=(0, 0), seed=None, observer=None):
+    """Perfect maze carved by a randomized depth-first search from ``start``."""
+    maze = grid_maze(width, height)
+    cells = maze.cells
+    size = maze.size
+    rnd = random.Random(seed).random
+
+    i = maze.index(*start)
+    cells[i] |= VISITED
+    if observer is not None:
+        observer(maze, i)
+    stack = [i]
+    down = 2 * width
+    while stack:
+        i = stack[-1]
+        # Unvisited rooms two cells away
+        x = i % width
+        rooms = []
+        if x + 2 < width and not cells[i + 2] & VISITED:
+            rooms.append(i + 2)
+        if x >= 2 and not cells[i - 2] & VISITED:
+            rooms.append(i - 2)
+        if i + down < size and not cells[i + down] & VISITED:
+            rooms.append(i + down)
+        if i >= down and not cells[i - down] & VISITED:
+            rooms.append(i - down)
+        if rooms:
+            j = rooms[int(rnd() * len(rooms))] if len(rooms) > 1 else rooms[0]
+            # Both rooms share a row or a column, so the wall is at the midpoint
+            cells[(i + j) >> 1] = 0
+            cells[j] |= VISITED
+            stack.append(j)
+            if observer is not None:
+                observer(maze, j)
+        else:
+            stack.pop()
+
+    maze.reset_flags()
+    return maze
+
+
+def prim(width, height, start=(0, 0), seed=None, observer=None):
+    """Perfect maze grown from ``start`` by opening frontier rooms in random priority order."""
+    maze = grid_maze(width, height)
+    cells = maze.cells
+    size = maze.size
+    bits = random.Random(seed).getrandbits
+    # Heap entries pack (priority, room) into one int, which compares faster than a tuple
+    shift = size.bit_length()
+    mask = (1 << shift) - 1
+
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    down = 2 * width
+
+    i = maze.index(*start)
+    cells[i] |= VISITED
+    heap = [i]
+    while heap:
+        i = heappop(heap) & mask
+        if observer is not None:
+            observer(maze, i)
+        x = i % width
+        for j in (i + 2 if x + 2 < width else -1, i - 2 if x >= 2 else -1,
+                  i + down if i + down < size else -1, i - down):
+            if j >= 0 and not cells[j] & VISITED:
+                cells[(i + j) >> 1] = 0
+                cells[j] |= VISITED
+                heappush(heap, bits(32) << shift | j)
+
+    maze.reset_flags()
+    return maze
+
+
+def eller_rows(width, height=None, seed=None):
+    """
+    Yield the rows of a perfect maze one at a time with Eller's algorithm,
+    as ``width``-byte buffers of WALL flags laid out like grid_maze. Only
+    the current row of rooms is kept, so memory is O(width) and with
+    ``height=None`` the stream never ends:
+        with open("tall.maze", "wb") as f:
+            for row in itertools.islice(eller_rows(1024, seed=1), 10**6):
+                f.write(row)
+    """
+    rnd = random.Random(seed).random
+    n = (width + 1) // 2  # rooms per row
+    wall_row = bytes((WALL,)) * width
+    # Rooms are labelled by the set they belong to; a new room gets n + its column,
+    # which no carried set uses since those are labelled by a column < n
+    label = list(range(n))
+    parent = list(range(n))
+    y = 0
+    while height is None or y < height:
+        last = height is not None and y + 2 >= height
+
+        # Union-find over the columns of this row, starting from the carried sets
+        first = {}
+        for c in range(n):
+            parent[c] = first.setdefault(label[c], c)
+
+        def find(c):
+            while parent[c] != c:
+                parent[c] = parent[parent[c]]
+                c = parent[c]
+            return c
+
+        # Join neighbouring rooms of different sets at random (all of them on the last row)
+        row = bytearray(wall_row)
+        row[0:width:2] = bytes(n)
+        for c in range(n - 1):
+            a = find(c)
+            b = find(c + 1)
+            if a != b and (last or rnd() < 0.5):
+                parent[b] = a
+                row[2 * c + 1] = 0
+        yield bytes(row)
+        if last:
+            if y + 1 < height:
+                yield wall_row
+            return
+
+        # Carry every set down at least once; rooms not carried start new sets
+        row = bytearray(wall_row)
+        members = {}
+        for c in range(n):
+            members.setdefault(find(c), []).append(c)
+        for root, columns in members.items():
+            down = [c for c in columns if rnd() < 0.5]
+            if not down:
+                down = [columns[int(rnd() * len(columns))]]
+            for c in down:
+                row[2 * c] = 0
+                label[c] = root
+            for c in columns:
+                if row[2 * c]:
+                    label[c] = n + c
+        yield bytes(row)
+        y += 2
+
+
+def eller(width, height, start=(0, 0), seed=None, observer=None):
+    """Perfect maze from eller_rows, collected into a CompactGrid (``start`` is not needed)."""
+    maze = CompactGrid(width, height)
+    cells = maze.cells
+    for y, row in enumerate(eller_rows(width, height, seed)):
+        cells[y * width:(y + 1) * width] = row
+        if observer is not None and y % 2 == 0:
+            for i in range(y * width, (y + 1) * width, 2):
+                observer(maze, i)
+    return maze
+
+
+GENERATORS = {
+    "backtracking": backtracking,
+    "prim": prim,
+    "eller": eller,
+}
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    for name, generate in GENERATORS.items():
+        t0 = time.perf_counter()
+        maze = generate(size, size, seed=0)
+        elapsed = time.perf_counter() - t0
+        walls = maze.size - maze.cells.count(0)
+        print(f"{name}: {size}x{size} in {elapsed:.2f}s ({walls} walls)")
@@ -0,0 +1,125 @@
+"""
+Open lists for the solvers.
+
+An open list stores (f, g, node) entries and pops the one with the lowest
+f. Solvers take the class to use as ``open_list``:
+  - HeapOpenList: binary heap of tuples (heapq); works with any costs and
+    breaks f ties on the smaller g.
+  - BucketOpenList: one bucket per integer f, each split into per-g stacks.
+    Push and pop are amortised O(1) and f ties go to the larger g, which
+    favours nodes closer to the goal. Only for integer costs and heuristics.
+
+Running this module compares their push/pop throughput and the time of a
+full search with each:
+    python open_list.py
+"""
+
+import heapq
+import random
+import time
+
+
+class HeapOpenList:
+    def __init__(self):
+        self._heap = []
+
+    def push(self, f, g, node):
+        heapq.heappush(self._heap, (f, g, node))
+
+    def pop(self):
+        return heapq.heappop(self._heap)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return (node for _, _, node in self._heap)
+
+
+class BucketOpenList:
+    def __init__(self):
+        self._buckets = []  # f -> list of stacks indexed by g
+        self._min_f = 0
+        self._size = 0
+
+    def push(self, f, g, node):
+        buckets = self._buckets
+        while len(buckets) <= f:
+            buckets.append([])
+        bucket = buckets[f]
+        while len(bucket) <= g:
+            bucket.append([])
+        bucket[g].append(node)
+        if f < self._min_f:
+            self._min_f = f
+        self._size += 1
+
+    def pop(self):
+        if not self._size:
+            raise IndexError("pop from empty open list")
+        buckets = self._buckets
+        f = self._min_f
+        while True:
+            bucket = buckets[f]
+            # Drop empty stacks from the top so the last one holds the largest g
+            while bucket and not bucket[-1]:
+                bucket.pop()
+            if bucket:
+                break
+            f += 1
+        self._min_f = f
+        self._size -= 1
+        g = len(bucket) - 1
+        return f, g, bucket[g].pop()
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            for stack in bucket:
+                yield from stack
+
+
+OPEN_LISTS = {
+    "heap": HeapOpenList,
+    "bucket": BucketOpenList,
+}
+
+
+if __name__ == '__main__':
+    from astar import COLS, MAX_BLOCKS, MIN_BLOCKS, ROWS, random_walls, solve
+    from compact_grid import CompactGrid
+
+    # Raw throughput: pushes with f spread like a grid search, then pops
+    rng = random.Random(0)
+    n = 200_000
+    entries = []
+    for i in range(n):
+        g = rng.randint(0, 400)
+        entries.append((g + rng.randint(0, 80), g, i))
+    for name, cls in OPEN_LISTS.items():
+        open_list = cls()
+        push = open_list.push
+        pop = open_list.pop
+        t0 = time.perf_counter()
+        for f, g, node in entries:
+            push(f, g, node)
+        t1 = time.perf_counter()
+        for _ in range(n):
+            pop()
+        t2 = time.perf_counter()
+        print(f"{name:>6}: {n / (t1 - t0) / 1e6:.2f} M pushes/s  {n / (t2 - t1) / 1e6:.2f} M pops/s")
+
+    # Whole searches on the squares.py boards
+    boards = []
+    for _ in range(300):
+        walls = random_walls(COLS, ROWS, rng.randint(MIN_BLOCKS, MAX_BLOCKS), ((0, 0), (COLS - 1, ROWS - 1)), rng)
+        boards.append(CompactGrid.from_walls(COLS, ROWS, walls))
+    goal = COLS * ROWS - 1
+    for name, cls in OPEN_LISTS.items():
+        t0 = time.perf_counter()
+        for grid in boards:
+            solve(grid, 0, goal, open_list=cls)
+        elapsed = time.perf_counter() - t0
+        print(f"{name:>6}: {elapsed * 1000 / len(boards):.3f} ms per {COLS}x{ROWS} search")
@@ -0,0 +1,187 @@
+"""
+LRU cache of solved paths on one grid.
+
+PathCache sits in front of a solver: the first query for a (start, goal)
+pair runs the solver, repeated ones return the stored path. A query whose
+start lies on a cached path to the same goal is answered with that path's
+suffix, since every part of a shortest path is itself shortest.
+
+It pays off on maps whose walls change rarely next to the paths asked
+for. The snake is not one: every move walls off the cell the head just
+left, which lies on the path it follows, and frees the tail, so no
+cached path survived until its next replan (0 hits over whole games).
+squares.py, which solves the same map file board after board, answers
+its query from a cache with CACHE_PATHS.
+
+The cache is bound to its grid, so the key is the endpoints plus the
+grid's wall ``version``, which CompactGrid bumps in set_wall and fill.
+When the walls were changed without telling the cache, every entry is
+stale and the next query drops them all. ``invalidate(changed)`` is the
+precise way: after walls are toggled in the grid, it drops only the
+entries those cells can affect and brings the cache to the new version:
+  - a new wall breaks exactly the cached paths that cross it
+  - a freed cell ``c`` can only shorten a path from s to g if
+    heuristic(s, c) + heuristic(c, g) is below its cost, and may connect
+    pairs that were unreachable
+On diagonal grids a cell also decides whether the diagonal moves around
+it cut a corner, so its eight neighbours are treated as changed as well.
+Counters ``hits``, ``misses``, ``evictions`` and ``invalidations`` report
+how the cache is doing.
+
+Running this module answers random queries on a random board while
+toggling walls, and checks every answer against the solver:
+    python path_cache.py [size] [queries]
+"""
+
+import random
+import sys
+import time
+
+from collections import OrderedDict
+
+from astar import random_walls, solve
+from compact_grid import CompactGrid, around
+from jps import path_cost
+
+INF = float('inf')
+
+
+class PathCache:
+    def __init__(self, grid, solver=solve, maxsize=1024):
+        self.grid = grid
+        self.solver = solver
+        self.maxsize = maxsize
+        self.version = getattr(grid, 'version', None)  # wall version every entry was solved at
+        self._entries = OrderedDict()  # (start, goal) -> (path or None, cost), least recently used first
+        self._through = {}             # cell -> keys of the cached paths crossing it
+        self._unreachable = set()      # keys cached as having no path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def find_path(self, start, goal, **solver_args):
+        """Path from ``start`` to ``goal`` (a new list) or None, solving only on a miss."""
+        version = getattr(self.grid, 'version', None)
+        if version != self.version:
+            # Walls changed behind the cache's back: nothing in it can be trusted
+            self.invalidations += len(self._entries)
+            self.clear()
+            self.version = version
+        key = (start, goal)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            path = entry[0]
+            return None if path is None else list(path)
+
+        # A cached path to the same goal through ``start`` gives the answer as its suffix
+        for other in self._through.get(start, ()):
+            if other[1] == goal:
+                self._entries.move_to_end(other)
+                self.hits += 1
+                path = self._entries[other][0]
+                return path[path.index(start):]
+
+        self.misses += 1
+        path = self.solver(self.grid, start, goal, **solver_args)
+        self._store(key, path)
+        return None if path is None else list(path)
+
+    def _store(self, key, path):
+        if len(self._entries) >= self.maxsize:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        if path is None:
+            self._entries[key] = (None, INF)
+            self._unreachable.add(key)
+            return
+        self._entries[key] = (path, path_cost(self.grid, path))
+        through = self._through
+        for cell in path:
+            keys = through.get(cell)
+            if keys is None:
+                through[cell] = {key}
+            else:
+                keys.add(key)
+
+    def _drop(self, key):
+        path, _ = self._entries.pop(key)
+        if path is None:
+            self._unreachable.discard(key)
+            return
+        through = self._through
+        for cell in path:
+            keys = through[cell]
+            keys.discard(key)
+            if not keys:
+                del through[cell]
+
+    def _around(self, cell):
+        # Cells whose paths a change at ``cell`` can affect
+        grid = self.grid
+        if not getattr(grid, 'diagonal', False):
+            return [cell]
+        return around(cell, grid.width, grid.height)
+
+    def invalidate(self, changed):
+        """Drop the entries affected by the ``changed`` cells, whose walls were toggled in the grid."""
+        grid = self.grid
+        heuristic = grid.heuristic
+        stale = set()
+        for cell in changed:
+            around = self._around(cell)
+            if grid.is_wall(cell):
+                for c in around:
+                    stale.update(self._through.get(c, ()))
+            else:
+                stale.update(self._unreachable)
+                for (start, goal), (path, cost) in self._entries.items():
+                    if path is not None and any(heuristic(start, c) + heuristic(c, goal) < cost for c in around):
+                        stale.add((start, goal))
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+        self.version = getattr(grid, 'version', None)
+
+    def clear(self):
+        self._entries.clear()
+        self._through.clear()
+        self._unreachable.clear()
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(0)
+    grid = CompactGrid.from_walls(size, size, random_walls(size, size, size * size // 4, rng=rng))
+    cache = PathCache(grid)
+    # Few endpoints, so queries repeat as they do on a fixed map
+    ends = rng.sample([i for i in range(grid.size) if not grid.is_wall(i)], 8)
+
+    cached_time = solve_time = 0.0
+    for n in range(queries):
+        start, goal = rng.choice(ends), rng.choice(ends)
+        t0 = time.perf_counter()
+        path = cache.find_path(start, goal)
+        cached_time += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        expected = solve(grid, start, goal)
+        solve_time += time.perf_counter() - t0
+        assert (path is None) == (expected is None), (n, start, goal)
+        assert path is None or path_cost(grid, path) == path_cost(grid, expected), (n, start, goal)
+
+        if n % 200 == 199:
+            # Toggle a wall, telling the cache half of the time; the version catches the other half
+            cell = rng.randrange(grid.size)
+            if cell not in ends:
+                grid.set_wall(cell, not grid.is_wall(cell))
+                if n % 400 == 199:
+                    cache.invalidate([cell])
+    print(f"{queries} queries on {size}x{size}: every answer matches the solver")
+    print(f"  hits {cache.hits}, misses {cache.misses}, invalidations {cache.invalidations}")
+    print(f"  cached {cached_time * 1000:.1f} ms, solver {solve_time * 1000:.1f} ms")
@@ -1,19 +1,57 @@
-import heapq
-from collections import deque
 import pygame
 from time import sleep
 import random
+import sys
+
+from astar import reconstruct_path
+from compact_grid import CompactGrid, END, IN_PATH, START, VISITED, WALL, around
+from frame_budget import FrameBudget
+from grid_view import ArrayView, GridView
+from landmarks import LandmarkGrid, landmarks_for
+from map_file import free_corners, load_map
+import maze_gen
+from soak import run_boards
+from solvers import SOLVERS
 
 MAZE_GEN_TYPE = 0
 # 0 for Backtracking
 # 1 for Heapq
+# 2 for Eller (fila a fila)
+
+ALGORITHM = "astar"
+# "astar" for A*
+# "jps" for Jump Point Search
+# "bidirectional" for A* bidireccional
+
+MAP_FILE = None
+# Si no és None, es resol el laberint desat en aquest fitxer (vegeu map_file.py)
+# en lloc de generar-ne un de nou
+
+LANDMARKS = 0
+# Nombre de fites per a l'heurística ALT (vegeu landmarks.py); 0 la desactiva.
+# Amb MAP_FILE les taules es desen al costat del mapa i només es calculen un cop
+
+STATS_FILE = None
+# Si no és None, s'escriuen les estadístiques de cada cerca en aquest fitxer
+# .csv o .jsonl a mesura que acaben (vegeu instrument.py)
+
+BOARDS = None
+# Nombre de laberints a resoldre abans de sortir; None no s'atura mai
+
+SOAK_LOG = 0
+# Cada quants segons s'escriuen laberints/s, expansions mitjanes i memòria
+# (vegeu soak.py); 0 ho desactiva
 
 # Constants
 WIDTH = 800               # Amplada de la finestra
 SQUARE_SIZE = 20         # Mida de cada quadrat
 ROWS = WIDTH // SQUARE_SIZE                 # Nombre de files
 COLS = WIDTH // SQUARE_SIZE                 # Nombre de columnes
-SLEEP_TIME = 0.000        # Retard per la visualització
+SLEEP_TIME = 0.000        # Retard per la visualització, per fotograma
+RENDERER = "rects"        # "rects" redibuixa les cel·les que canvien, "array" fotogrames sencers amb NumPy (graelles grans)
+STEPS_PER_FRAME = 1       # Passos (cel·les generades o expandides) entre dos fotogrames; None sense límit
+FRAME_TIME = None         # Segons de càlcul entre dos fotogrames; None sense límit
+FPS = None                # Màxim de fotogrames per segon (vegeu frame_budget.py)
 
 MIN_BLOCKS = 400          # Mínim de cel·les bloquejades
 MAX_BLOCKS = 500          # Màxim de cel·les bloquejades
@@ -28,62 +66,51 @@ YELLOW = (255, 255, 0)
 ORANGE = (255, 165, 0)
 
 WIN = None  # La finestra global
+VIEW = None  # Colors de les cel·les a la finestra (vegeu grid_view.py)
+
+def cell_color(flags, in_current_path):
+    # Selecciona el color en funció dels bits de la cel·la
+    if flags & WALL:
+        return BLACK
+    if flags & START:
+        return YELLOW
+    if flags & END:
+        return ORANGE
+    if in_current_path:
+        return RED
+    if flags & IN_PATH:
+        return BLUE
+    return WHITE
 
-class Cell:
-    def __init__(self, x, y, wall=False):
-        self.x = x
-        self.y = y
-        self.wall = wall
-        self.visited = False
-        self.start = False
-        self.end = False
-        self.in_path = False
-
-    def draw(self, path):
-        # Selecciona el color en funció de la propietat de la cel·la
-        if self.wall:
-            color = BLACK
-        elif self.start:
-            color = YELLOW
-        elif self.end:
-            color = ORANGE
-        elif (self.x, self.y) in path:
-            color = RED
-        elif self.in_path:
-            color = BLUE
-        else:
-            color = WHITE
-        pygame.draw.rect(WIN, color, (self.x * SQUARE_SIZE, self.y * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-    def neighbors_that_are_not_wall(self, maze):
-        # Retorna els veïns que no són parets
-        neighbors = []
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            nx, ny = self.x + dx, self.y + dy
-            if nx < 0 or nx >= COLS or ny < 0 or ny >= ROWS:
-                continue
-            if not maze[nx][ny].wall:
-                neighbors.append(maze[nx][ny])
-        return neighbors
-    
 def gen_empty_maze():
     # Genera una graella plena de cel·les sense parets
-    return [[Cell(x, y, False) for y in range(ROWS)] for x in range(COLS)]
+    return CompactGrid(COLS, ROWS)
+
+# Color de cada valor possible dels bits d'una cel·la fora del camí actual
+FLAG_COLORS = [cell_color(flags, False) for flags in range(256)]
 
-def draw_grid():
-    WIN.fill(WHITE)
-    # Dibuixa les línies de la graella
-    for i in range(ROWS + 1):
-        pygame.draw.line(WIN, BLACK, (0, i * SQUARE_SIZE), (WIDTH, i * SQUARE_SIZE))
-    for j in range(COLS + 1):
-        pygame.draw.line(WIN, BLACK, (j * SQUARE_SIZE, 0), (j * SQUARE_SIZE, WIDTH))
+def paint(maze, cells, path=()):
+    # Actualitza el color de les cel·les indicades al buffer d'estat de VIEW
+    flags = maze.cells
+    for i in cells:
+        VIEW.set(i, cell_color(flags[i], i in path))
 
 def draw_maze(maze, path):
-    draw_grid()
-    for row in maze:
-        for cell in row:
-            cell.draw(path)
-    pygame.display.update()
+    # Redibuixa totes les cel·les; només es fa un cop per laberint, la resta
+    # de passos només redibuixen les cel·les que canvien
+    global VIEW
+    if VIEW is None or (VIEW.width, VIEW.size) != (maze.width, maze.size):
+        # Els mapes desats poden tenir qualsevol mida: la cel·la s'ajusta a la finestra
+        cell_size = WIDTH // max(maze.width, maze.height)
+        if cell_size < 1:
+            raise ValueError(f"el laberint de {maze.width}x{maze.height} no cap en una finestra de {WIDTH}px")
+        if RENDERER == "array":
+            VIEW = ArrayView(maze.width, maze.height, cell_size)
+        else:
+            VIEW = GridView(maze.width, maze.height, cell_size)
+    VIEW.load(maze.cells, FLAG_COLORS)
+    paint(maze, path, set(path))
+    pygame.display.update(VIEW.draw(WIN))
 
 def add_random_walls(maze, start, end):
     # Afegeix aleatòriament parets, assegurant que el punt d'inici i final no quedin bloquejats
@@ -94,180 +121,142 @@ def add_random_walls(maze, start, end):
         y = random.randint(0, ROWS - 1)
         if (x, y) == start or (x, y) == end:
             continue
-        if not maze[x][y].wall:
-            maze[x][y].wall = True
+        i = maze.index(x, y)
+        if not maze.is_wall(i):
+            maze.set_wall(i)
             placed += 1
 
-def grid_maze():
-    maze = gen_empty_maze()
-    for x in range(COLS):
-        for y in range(ROWS):
-            if x % 2 == 1 or y % 2 == 1:
-                maze[x][y].wall = True
-    return maze
-
-
-def gen_procedural_maze(start):
-    maze = grid_maze()
-    heap = []
-    heapq.heappush(heap, (0, start))
-    visited = set()
-    visited.add(start)
-    while heap:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-        _, pos = heapq.heappop(heap)
-        x, y = pos
-        maze[x][y].visited = True
-        visited.add((x, y))
-        draw_maze(maze, [])
-        dirs = [(2, 0), (-2, 0), (0, 2), (0, -2)]
-        random.shuffle(dirs)
-        for dx, dy in dirs:
-            nx, ny = x + dx, y + dy
-            if nx < 0 or nx >= COLS or ny < 0 or ny >= ROWS:
-                continue
-            if maze[nx][ny].visited:
-                continue
-            if (nx, ny) in visited:
-                continue
-            maze[(x + nx) // 2][(y + ny) // 2].wall = False
-            heapq.heappush(heap, (random.random(), (nx, ny)))
-            visited.add((nx, ny))
-    return maze
-
-def gen_procedural_maze_backtracking(start):
-    maze = grid_maze()  
-    stack = []
-    x, y = start
-    maze[x][y].visited = True
-    maze[x][y].wall = False
-    stack.append((x, y))
-    
-    while stack:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-        x, y = stack[-1]
-        neighbors = []
-        for dx, dy in [(2, 0), (-2, 0), (0, 2), (0, -2)]:
-            nx, ny = x + dx, y + dy
-            if nx < 0 or nx >= COLS or ny < 0 or ny >= ROWS:
-                continue
-            if not maze[nx][ny].visited:
-                neighbors.append((nx, ny))
-        if neighbors:
-            nx, ny = random.choice(neighbors)
-            mid_x = (x + nx) // 2
-            mid_y = (y + ny) // 2
-            maze[mid_x][mid_y].wall = False
-            maze[nx][ny].visited = True
-            maze[nx][ny].wall = False
-            stack.append((nx, ny))
+def grid_maze(cols=COLS, rows=ROWS):
+    # Parets a totes les columnes i files senars, vegeu maze_gen.grid_maze
+    return maze_gen.grid_maze(cols, rows)
+
+def check_quit():
+    # Surt si l'usuari tanca la finestra
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+
+def step_drawer():
+    # Observador de la generació: la primera crida dibuixa tot el laberint i les
+    # següents el voltant de la cel·la nova i de l'anterior, que és on el
+    # generador tomba parets (Prim les tomba just després d'avisar)
+    last = None
+    budget = FrameBudget(STEPS_PER_FRAME, FRAME_TIME, FPS)
+
+    def draw_step(maze, i):
+        nonlocal last
+        if last is None:
             draw_maze(maze, [])
-            sleep(SLEEP_TIME)
         else:
-            stack.pop()
-            draw_maze(maze, [])
-            sleep(SLEEP_TIME)
-    
-    return maze
+            paint(maze, around(last, maze.width, maze.height) + around(i, maze.width, maze.height))
+            if budget.step():
+                check_quit()
+                pygame.display.update(VIEW.draw(WIN))
+                sleep(SLEEP_TIME)
+                budget.wait()
+        last = i
 
+    return draw_step
 
-def calculate_heuristic(x, y, end):
-    # Distància Manhattan
-    return abs(end[0] - x) + abs(end[1] - y)
+# La generació es fa a maze_gen, sense pygame; amb draw=False no es dibuixa res
+def gen_procedural_maze(start, cols=COLS, rows=ROWS, draw=True, seed=None):
+    return maze_gen.prim(cols, rows, start, seed, step_drawer() if draw else None)
 
-def a_star(maze, start, end):
-    # Reinicia les propietats de totes les cel·les
-    for row in maze:
-        for cell in row:
-            cell.visited = False
-            cell.in_path = False
-            cell.start = False
-            cell.end = False
+def gen_procedural_maze_backtracking(start, cols=COLS, rows=ROWS, draw=True, seed=None):
+    return maze_gen.backtracking(cols, rows, start, seed, step_drawer() if draw else None)
+
+def gen_procedural_maze_eller(start, cols=COLS, rows=ROWS, draw=True, seed=None):
+    return maze_gen.eller(cols, rows, start, seed, step_drawer() if draw else None)
+
+def next_maze(start):
+    # Carrega el mapa desat o genera un laberint nou segons MAZE_GEN_TYPE
+    if MAP_FILE is not None:
+        # Còpia privada: la cerca hi escriu els bits de visitat i de camí
+        maze, _ = load_map(MAP_FILE, writable=True)
+        return maze
+    match MAZE_GEN_TYPE:
+        case 0:
+            return gen_procedural_maze_backtracking(start)
+        case 1:
+            return gen_procedural_maze(start)
+        case 2:
+            return gen_procedural_maze_eller(start)
+
+
+def a_star(maze, start, end, stats=None):
+    # Resol un laberint i en retorna el camí
+    # Reinicia les propietats de totes les cel·les d'una sola passada
+    maze.reset_flags()
+    cells = maze.cells
 
     # Marca el punt d'inici i final
-    maze[start[0]][start[1]].start = True
-    maze[end[0]][end[1]].end = True
+    start_i = maze.index(*start)
+    end_i = maze.index(*end)
+    cells[start_i] |= START
+    cells[end_i] |= END
+
+    draw_maze(maze, [])
+    budget = FrameBudget(STEPS_PER_FRAME, FRAME_TIME, FPS)
+    shown = []  # Camí dibuixat a l'últim fotograma
+
+    def show_path(path):
+        # Només canvien les cel·les del camí anterior i les de l'actual
+        nonlocal shown
+        VIEW.load(cells, FLAG_COLORS, shown)
+        shown = path
+        VIEW.set_many(path, RED)
+        paint(maze, (start_i, end_i))
+        pygame.display.update(VIEW.draw(WIN))
 
-    open_set = []
-    heapq.heappush(open_set, (calculate_heuristic(start[0], start[1], end), 0, start[0], start[1], [start]))
-    g_scores = {start: 0}
-    path_found = False
+    def on_expand(current, came_from):
+        cells[current] |= VISITED
+        # Marca el camí actual seguint els punters al pare: ens aturem a la primera
+        # cel·la ja marcada, perquè tots els seus avantpassats també ho estan
+        changed = [current]
+        pos = current
+        while pos is not None and not cells[pos] & IN_PATH:
+            cells[pos] |= IN_PATH
+            changed.append(pos)
+            pos = came_from.get(pos)
+        paint(maze, changed)
+        if not budget.step():
+            return
 
-    while open_set:
         sleep(SLEEP_TIME)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-
-        f_score, current_g, x, y, path = heapq.heappop(open_set)
-        current = (x, y)
-        maze[x][y].visited = True
-        # Marca el camí actual: actualitza la propietat in_path de les cel·les corresponents
-
-        for pos in path:
-            maze[pos[0]][pos[1]].in_path = True
-
-        draw_maze(maze, path)
-        
-        if current == end:
-            path_found = True
-            break
-
-        # Explora els veïns (amunt, avall, esquerra, dreta)
-        for dx, dy in [(1,0), (-1,0), (0,1), (0,-1)]:
-            nx, ny = x + dx, y + dy
-            if nx < 0 or nx >= COLS or ny < 0 or ny >= ROWS:
-                continue
-            neighbor = maze[nx][ny]
-            if neighbor.wall or neighbor.visited:
-                continue
-            tentative_g = current_g + 1
-            if (nx, ny) not in g_scores or tentative_g < g_scores[(nx, ny)]:
-                g_scores[(nx, ny)] = tentative_g
-                new_f = tentative_g + calculate_heuristic(nx, ny, end)
-                heapq.heappush(open_set, (new_f, tentative_g, nx, ny, path + [(nx, ny)]))
-    if path_found:
-        draw_maze(maze, path)
+        check_quit()
+        show_path(reconstruct_path(came_from, current))
+        budget.wait()
+
+    grid = maze
+    if LANDMARKS:
+        grid = LandmarkGrid(maze, landmarks_for(maze, LANDMARKS, MAP_FILE))
+    path = SOLVERS[ALGORITHM](grid, start_i, end_i, on_expand, stats)
+    if path is not None:
+        # Potser no s'ha dibuixat el fotograma de l'última expansió
+        show_path(path)
         sleep(1)
-    
-    start = (0, 0)
-    end = (COLS - 2, ROWS - 2)
-    match MAZE_GEN_TYPE:
-        case 0:
-            maze = gen_procedural_maze_backtracking(start)
-        case 1:
-            maze = gen_procedural_maze(start)
-    a_star(maze, start, end)
+    return path
 
 def main():
     global WIN
     pygame.init()
     WIN = pygame.display.set_mode((WIDTH, WIDTH))
-    pygame.display.set_caption("A* amb la classe Cell")
+    pygame.display.set_caption("A* amb una graella compacta")
     
     
-    start = (0, 0)
-    match MAZE_GEN_TYPE:
-        case 0:
-            maze = gen_procedural_maze_backtracking(start)
-        case 1:
-            maze = gen_procedural_maze(start)
-    end = (COLS - 2, ROWS - 2)
-    a_star(maze, start, end)
-
-    # Espera que l'usuari tanqui la finestra
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+    # Un laberint rere l'altre en un bucle, i no a_star cridant-se a si mateix,
+    # perquè la pila no creixi en execucions llargues
+    def board(stats):
+        start = (0, 0)
+        end = (COLS - 2, ROWS - 2)
+        maze = next_maze(start)
+        if MAP_FILE is not None:
+            # Els extrems del mapa, no els de la finestra
+            start, end = free_corners(maze)
+        a_star(maze, start, end, stats)
+
+    run_boards(board, BOARDS, SOAK_LOG, STATS_FILE, check_quit, algorithm=ALGORITHM, maze=MAZE_GEN_TYPE)
     pygame.quit()
 
 if __name__ == '__main__':
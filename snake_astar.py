@@ -25,14 +25,21 @@
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame
-import heapq
-import random
 import sys
 
+import time
+
+from astar import EXPAND, PUSH, reconstruct_path
+from grid_view import ArrayView
+from instrument import QueryWriter
+from snake_sim import SnakeSim
+
 # --------- Global Constants ---------
 GRID_WIDTH = 30
 GRID_HEIGHT = 30
 CELL_SIZE = 20
+STATS_FILE = None  # Write the statistics of every search to this .csv or .jsonl file as it finishes (see instrument.py)
+RENDERER = "shapes"  # "shapes" draws each cell with pygame.draw, "array" whole frames with NumPy (for big grids)
 WINDOW_WIDTH = GRID_WIDTH * CELL_SIZE
 WINDOW_HEIGHT = GRID_HEIGHT * CELL_SIZE
 
@@ -45,226 +52,87 @@ GREEN       = (0, 255, 0)     # snake head
 DARK_GREEN  = (0, 180, 0)     # snake body
 RED         = (255, 0, 0)     # apple
 
-# --------- A* Helper Functions ---------
-def heuristic(a, b):
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-def neighbors(node):
-    x, y = node
-    results = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
-    valid = []
-    for nx, ny in results:
-        if 0 <= nx < GRID_WIDTH and 0 <= ny < GRID_HEIGHT:
-            valid.append((nx, ny))
-    return valid
-
-def reconstruct_path(came_from, current):
-    path = [current]
-    while current in came_from:
-        current = came_from[current]
-        path.append(current)
-    path.reverse()
-    return path
-
-def astar_search(start, goal, obstacles, visualize=True):
+# --------- Search Visualization ---------
+class SearchView:
     """
-    A* search implemented as a generator for visualization.
-    Parameters:
-      start: starting cell (tuple)
-      goal: target cell (tuple)
-      obstacles: set of cells that cannot be passed (e.g. snake's body, excluding the head)
-      visualize: whether to yield intermediate states for visualization (default: True)
-    Yields dictionaries with the current A* state:
-      - "current": cell being expanded
-      - "closed": set of already expanded cells
-      - "open": list of cells in the frontier (for information)
-      - "came_from": dictionary of parent pointers
-      - "done": whether the search is finished
-      - "final": whether this is the final state (path found or failure)
-    When a path is found, the final yield includes key "path" with the full path.
+    The renderer's own view of a running search, built from search events.
+    Expanded cells are painted once onto a persistent overlay, so drawing
+    a frame does not depend on how many cells the search has closed.
     """
-    open_set = []
-    heapq.heappush(open_set, (heuristic(start, goal), 0, start))
-    came_from = {}
-    gscore = {start: 0}
-    closed_set = set()
-    counter = 0
-
-    while open_set:
-        current_f, _, current = heapq.heappop(open_set)
-        if visualize:
-            # Yield the state for visualization.
-            yield {
-                "current": current,
-                "closed": closed_set.copy(),
-                "open": [item[2] for item in open_set],
-                "came_from": came_from.copy(),
-                "done": False,
-                "final": False,
-            }
-        if current == goal:
-            path = reconstruct_path(came_from, current)
-            yield {"path": path, "done": True, "final": True}
-            return
 
-        closed_set.add(current)
-
-        for neighbor in neighbors(current):
-            if neighbor in obstacles:
-                continue
-            if neighbor in closed_set:
-                continue
-            tentative_g = gscore[current] + 1
-            if neighbor not in gscore or tentative_g < gscore[neighbor]:
-                came_from[neighbor] = current
-                gscore[neighbor] = tentative_g
-                fscore = tentative_g + heuristic(neighbor, goal)
-                counter += 1
-                heapq.heappush(open_set, (fscore, counter, neighbor))
-    # No path found:
-    yield {"path": None, "done": True, "final": True}
-    return
+    def __init__(self, size):
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA)
+        self.reset()
+
+    def reset(self):
+        self.overlay.fill((0, 0, 0, 0))
+        self.came_from = {}
+        self.current = None
+        self.newly_closed = []
+
+    def apply(self, event):
+        kind = event[0]
+        if kind == PUSH:
+            self.came_from[event[1]] = event[2]
+        elif kind == EXPAND:
+            if self.current is not None:
+                self.newly_closed.append(self.current)
+            self.current = event[1]
+
+    def draw(self, screen):
+        # Paint only the cells closed since the last frame onto the overlay.
+        for cx, cy in self.newly_closed:
+            pygame.draw.rect(self.overlay, GREY, (cx * CELL_SIZE, cy * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+        self.newly_closed.clear()
+        screen.blit(self.overlay, (0, 0))
+
+        # Draw the current cell and the path leading to it in bright white.
+        if self.current is not None:
+            for cx, cy in reconstruct_path(self.came_from, self.current):
+                pygame.draw.rect(screen, WHITE, (cx * CELL_SIZE, cy * CELL_SIZE, CELL_SIZE, CELL_SIZE))
 
 # --------- The Snake Game Class ---------
-class SnakeGame:
+class SnakeGame(SnakeSim):
+    """Window, drawing and search animation on top of the headless snake_sim.SnakeSim."""
     visualize = True
+    verbose = True
 
     def __init__(self):
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Snake with A* Radar & Growing Body")
         self.clock = pygame.time.Clock()
-        self.reset_game()
-
-    def reset_game(self):
-        # Initialize the snake with a few segments.
-        midx = GRID_WIDTH // 2
-        midy = GRID_HEIGHT // 2
-        self.snake = [(midx, midy), (midx - 1, midy), (midx - 2, midy)]
-        self.apple = self.random_apple()
-        # Modes:
-        # "compute" = A* is computing the path to the apple
-        # "move"    = snake is following the computed path
-        self.mode = "compute"
-        self.astar_generator = self.create_astar_generator()
-        self.astar_state = None
-        self.path = None  # Final computed path (list of cells, excluding current head)
-
-    def random_apple(self):
-        # Choose a random apple location not on the snake.
-        while True:
-            pos = (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
-            if pos not in self.snake:
-                return pos
-
-    def create_astar_generator(self):
-        # For planning, treat the snake's body (except the head) as obstacles.
-        obstacles = set(self.snake[1:])
-        return astar_search(self.snake[0], self.apple, obstacles, self.visualize)
-
-        # Inside the SnakeGame class
-
-    def is_safe(self, cell):
-        x, y = cell
-        # Check boundaries.
-        if not (1 <= x < GRID_WIDTH and 1 <= y < GRID_HEIGHT):
-            return False
-        # In a normal move the tail is removed, so we allow the tail cell.
-        # Thus, obstacles are all snake segments except the tail.
-        obstacles = set(self.snake[:-1])
-        return cell not in obstacles
-
-    def compute_reachable_area(self, start, obstacles):
-        """Returns the number of cells reachable from 'start' given a set of obstacles."""
-        visited = set()
-        queue = [start]
-        area = 0
-        while queue:
-            cell = queue.pop(0)
-            if cell in visited:
-                continue
-            visited.add(cell)
-            area += 1
-            for neighbor in neighbors(cell):
-                if neighbor in visited:
-                    continue
-                # If the neighbor is not blocked and is within the grid.
-                if neighbor in obstacles:
-                    continue
-                queue.append(neighbor)
-        return area
-
-    def fallback_move(self):
-        """Choose the safe move (among neighbors) that maximizes reachable area."""
-        head = self.snake[0]
-        candidates = []
-        for d in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
-            new_head = (head[0] + d[0], head[1] + d[1])
-            if self.is_safe(new_head):
-                # Simulate next state: new snake = [new_head] + snake[:-1]
-                simulated_snake = [new_head] + self.snake[:-1]
-                obstacles = set(simulated_snake)
-                area = self.compute_reachable_area(new_head, obstacles)
-                candidates.append((area, new_head))
-        if not candidates:
-            return None
-        # Choose the move with maximum reachable area.
-        best_area, best_move = max(candidates, key=lambda x: x[0])
-        return best_move
+        self.search_view = SearchView((WINDOW_WIDTH, WINDOW_HEIGHT))
+        # Explored cells of the running search, with the rest of the frame overlaid on each draw
+        self.board = ArrayView(GRID_WIDTH, GRID_HEIGHT, CELL_SIZE, background=BLACK) if RENDERER == "array" else None
+        if STATS_FILE is not None:
+            self.query_writer = QueryWriter(STATS_FILE)
+        super().__init__(GRID_WIDTH, GRID_HEIGHT)
+
+    def quit(self):
+        if self.query_writer is not None:
+            self.query_writer.close()
+        pygame.quit()
+        sys.exit()
+
+    def start_search(self):
+        super().start_search()
+        self.search_view.reset()
+        if self.board is not None:
+            self.board.reset()
+
+    def on_search_event(self, event):
+        self.search_view.apply(event)
+        if self.board is not None and event[0] == EXPAND:
+            x, y = event[1]
+            self.board.set(y * GRID_WIDTH + x, GREY)
 
     def update(self):
         # Process quit events.
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-        if self.mode == "compute":
-            try:
-                self.astar_state = next(self.astar_generator)
-                if self.astar_state.get("done"):
-                    # A* finished—check if a path was found.
-                    if self.astar_state.get("path") is None:
-                        print("No path to apple found! Using space-optimizing fallback move.")
-                        fallback = self.fallback_move()
-                        if fallback is not None:
-                            # Fallback: use the chosen move as a one-step path.
-                            self.path = [fallback]
-                        else:
-                            # If no safe move is found, simply do nothing.
-                            self.path = []
-                        self.mode = "move"
-                    else:
-                        full_path = self.astar_state["path"]
-                        # Remove the first cell (current head) from the planned path.
-                        self.path = full_path[1:] if len(full_path) > 1 else []
-                        self.mode = "move"
-            except StopIteration:
-                self.mode = "move"
-
-        elif self.mode == "move":
-            # Follow the computed path (or fallback move) one step at a time.
-            if self.path and len(self.path) > 0:
-                next_cell = self.path.pop(0)
-                if next_cell == self.apple:
-                    # Grow: add new head and keep tail.
-                    self.snake.insert(0, next_cell)
-                    self.apple = self.random_apple()
-                    self.mode = "compute"
-                    self.astar_generator = self.create_astar_generator()
-                    self.astar_state = None
-                    self.path = None
-                else:
-                    # Normal move: add new head and remove tail.
-                    self.snake.insert(0, next_cell)
-                    self.snake.pop()
-            else:
-                # No valid path (or finished path) – replan.
-                self.mode = "compute"
-                self.astar_generator = self.create_astar_generator()
-                self.astar_state = None
-                self.path = None
-
+                self.quit()
+        super().update()
 
     def draw_grid(self):
         for x in range(0, WINDOW_WIDTH, CELL_SIZE):
@@ -272,7 +140,36 @@ class SnakeGame:
         for y in range(0, WINDOW_HEIGHT, CELL_SIZE):
             pygame.draw.line(self.screen, DARK_GREY, (0, y), (WINDOW_WIDTH, y))
 
+    def draw_array(self):
+        # The same frame as draw, as one array: explored cells, then everything else on top
+        board = self.board
+        if self.mode != "compute":
+            board.reset()
+
+        def cells(points):
+            return [y * GRID_WIDTH + x for x, y in points]
+
+        overlay = [(cells([self.apple]), RED), (cells(self.snake), DARK_GREEN), (cells([self.snake.head]), GREEN)]
+        view = self.search_view
+        if self.mode == "compute" and view.current is not None:
+            overlay.append((cells(reconstruct_path(view.came_from, view.current)), WHITE))
+        if self.mode == "move" and self.path:
+            overlay.append((cells(self.path), WHITE))
+        board.draw(self.screen, overlay)
+
     def draw(self):
+        t0 = time.perf_counter()
+        if self.board is not None:
+            self.draw_array()
+        else:
+            self.draw_shapes()
+        pygame.display.flip()
+        if self.mode == "compute" and self.query_stats is not None:
+            # Frames drawn while a search runs count towards its rendering time;
+            # the ones of the "move" phase come after it
+            self.query_stats.render_time += time.perf_counter() - t0
+
+    def draw_shapes(self):
         self.screen.fill(BLACK)
         self.draw_grid()
 
@@ -289,27 +186,8 @@ class SnakeGame:
             pygame.draw.rect(self.screen, color, rect)
 
         # Visualize A* search when computing:
-        if self.mode == "compute" and self.astar_state:
-            # Draw explored (closed) cells in grey.
-            for cell in self.astar_state.get("closed", set()):
-                cx, cy = cell
-                rect = pygame.Rect(cx * CELL_SIZE, cy * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(self.screen, GREY, rect)
-            # Draw the current cell being expanded in bright white.
-            current = self.astar_state.get("current", None)
-            if current:
-                cx, cy = current
-                rect = pygame.Rect(cx * CELL_SIZE, cy * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(self.screen, WHITE, rect)
-
-            came_from = self.astar_state.get("came_from", {})
-            if current:
-                path_so_far = reconstruct_path(came_from, current)
-                for cell in path_so_far:
-                    cx, cy = cell
-                    rect = pygame.Rect(cx * CELL_SIZE, cy * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                    pygame.draw.rect(self.screen, WHITE, rect)
-
+        if self.mode == "compute":
+            self.search_view.draw(self.screen)
 
         if self.mode == "move" and self.path:
             for cell in self.path:
@@ -319,16 +197,13 @@ class SnakeGame:
                                    CELL_SIZE // 2, CELL_SIZE // 2)
                 pygame.draw.rect(self.screen, WHITE, rect)
 
-        pygame.display.flip()
-
     def run(self):
         ticks = 20
         self.visualize = True
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    self.quit()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_UP:
                         ticks += 5
@@ -336,6 +211,8 @@ class SnakeGame:
                         ticks -= 5
                     elif event.key == pygame.K_SPACE:
                         self.visualize = not self.visualize
+                    elif event.key == pygame.K_i:
+                        self.incremental = not self.incremental
             self.update()
             self.draw()
             self.clock.tick(ticks)
@@ -346,6 +223,7 @@ if __name__ == "__main__":
     print("Controls:")
     print("  Arrow keys: Increase/decrease speed")
     print("  Space: Toggle visualization")
+    print("  I: Toggle incremental (D* Lite) planning")
     print("=========================================")
     game = SnakeGame()
     game.run()
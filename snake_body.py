@@ -0,0 +1,90 @@
+"""
+Snake body with O(1) updates and occupancy queries.
+
+Segments live in a deque (head first) and a bytearray keeps how many
+segments cover each cell, so moving the head, dropping the tail, membership
+and "occupied except by the tail" checks all cost O(1) however long the
+snake is. The planners get the body as a CompactGrid of walls, and
+``changed`` collects the cells whose obstacle state may have flipped since
+the incremental planner last looked.
+"""
+
+from collections import deque
+
+from compact_grid import WALL, CompactGrid
+
+# Translation table mapping any non-zero segment count to WALL
+_OCCUPIED = bytes((WALL if c else 0) for c in range(256))
+
+
+class SnakeBody:
+    def __init__(self, width, height, segments):
+        self.width = width
+        self.height = height
+        self.segments = deque(segments)
+        self.counts = bytearray(width * height)
+        for x, y in segments:
+            self.counts[y * width + x] += 1
+        self.changed = []
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __contains__(self, cell):
+        x, y = cell
+        return self.counts[y * self.width + x] > 0
+
+    @property
+    def head(self):
+        return self.segments[0]
+
+    @property
+    def tail(self):
+        return self.segments[-1]
+
+    def push_head(self, cell):
+        old_head = self.segments[0]
+        self.segments.appendleft(cell)
+        x, y = cell
+        self.counts[y * self.width + x] += 1
+        # The old head becomes an obstacle; the new one stops being one
+        self.changed.append(old_head)
+        self.changed.append(cell)
+
+    def pop_tail(self):
+        cell = self.segments.pop()
+        x, y = cell
+        self.counts[y * self.width + x] -= 1
+        self.changed.append(cell)
+        return cell
+
+    def occupied_except_tail(self, cell):
+        # True if a segment other than the tail (which moves away next tick) covers ``cell``
+        x, y = cell
+        count = self.counts[y * self.width + x]
+        return count > 1 or (count == 1 and cell != self.segments[-1])
+
+    def is_obstacle(self, cell):
+        # Obstacle for planning from the head: covered by any segment but the head
+        x, y = cell
+        count = self.counts[y * self.width + x]
+        return count > 1 or (count == 1 and cell != self.segments[0])
+
+    def obstacle_grid(self):
+        """CompactGrid whose walls are the body minus the head."""
+        grid = CompactGrid(self.width, self.height, self.counts.translate(_OCCUPIED))
+        hx, hy = self.segments[0]
+        if self.counts[hy * self.width + hx] == 1:
+            grid.cells[hy * self.width + hx] = 0
+        return grid
+
+    def blocked_except_tail(self):
+        """Occupancy buffer (non-zero = blocked) of every segment but the tail, as after a normal move."""
+        blocked = self.counts.translate(_OCCUPIED)
+        tx, ty = self.segments[-1]
+        if self.counts[ty * self.width + tx] == 1:
+            blocked[ty * self.width + tx] = 0
+        return blocked
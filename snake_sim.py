@@ -0,0 +1,362 @@
+"""
+Headless snake simulation and batch runner.
+
+SnakeSim holds all of the snake game logic (planning, moving, eating,
+fallback moves) without pygame; snake_astar.SnakeGame adds the window,
+the drawing and the search animation on top of it. With no display the
+game steps ``update()`` as fast as the planner allows.
+
+Running this module plays many seeded games across a process pool and
+streams one JSON line per game (its configuration, then score, length,
+ticks, replans and planner time) to a new results file:
+    python snake_sim.py --games 1000 --out results.jsonl --incremental
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from astar import DONE, EXPAND, PUSH, SearchStats, search_events
+from dstar_lite import DStarLite
+from flood_fill import FloodFill
+from frame_budget import FrameBudget
+from open_list import OPEN_LISTS
+from snake_body import SnakeBody
+from solvers import SOLVERS
+
+
+def astar_search(start, goal, grid, visualize=True, algorithm="astar", open_list="heap", stats=None):
+    """
+    A* search implemented as a generator of search events.
+    Parameters:
+      start: starting cell (tuple)
+      goal: target cell (tuple)
+      grid: CompactGrid whose walls cannot be passed (e.g. snake's body, excluding the head)
+      visualize: whether to yield intermediate events for visualization (default: True)
+      algorithm: solver from solvers.SOLVERS used when visualize is False (default: "astar")
+      open_list: open list from open_list.OPEN_LISTS, "heap" or "bucket" (default: "heap")
+      stats: astar.SearchStats to fill in with the search counters (default: None)
+    Yields the deltas of astar.search_events, which only say what changed:
+      - (EXPAND, cell): cell taken from the frontier
+      - (PUSH, cell, parent): cell added to the frontier with its parent
+      - (DONE, path): search finished, path is None if the apple is unreachable
+    With visualize=False the search runs to completion in the headless solver
+    and only the DONE event is yielded.
+    """
+    coords = grid.coords
+    start = grid.index(*start)
+    goal = grid.index(*goal)
+    if not visualize:
+        path = SOLVERS[algorithm](grid, start, goal, stats=stats, open_list=OPEN_LISTS[open_list])
+        yield DONE, None if path is None else [coords(i) for i in path]
+        return
+
+    # Translate the grid indices of the events back to cells.
+    for event in search_events(grid, start, goal, OPEN_LISTS[open_list], stats):
+        kind = event[0]
+        if kind == PUSH:
+            yield PUSH, coords(event[1]), coords(event[2])
+        elif kind == EXPAND:
+            yield EXPAND, coords(event[1])
+        else:
+            yield DONE, None if event[1] is None else [coords(i) for i in event[1]]
+
+
+class SnakeSim:
+    visualize = False
+    verbose = False       # print when the planner falls back to a space-saving move
+    algorithm = "astar"   # solver used when visualization is off: "astar", "jps" or "bidirectional"
+    open_list = "heap"    # open list used by the planner: "heap" or "bucket"
+    incremental = False   # plan with D* Lite, repairing the previous plan (slower than A* here, see incremental_search)
+    query_writer = None   # instrument.QueryWriter that gets one row per finished search
+    steps_per_tick = 1    # expansions an animated search advances per tick (None: no limit)
+    time_per_tick = None  # seconds an animated search may run per tick (None: no limit)
+
+    def __init__(self, width, height, seed=None, **options):
+        # options override the class settings above, e.g. incremental=True
+        for name, value in options.items():
+            if not hasattr(self, name):
+                raise TypeError(f"unknown SnakeSim option: {name}")
+            setattr(self, name, value)
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.flood_fill = FloodFill(width, height)
+        self.reset_game()
+
+    def reset_game(self):
+        # Initialize the snake with a few segments.
+        midx = self.width // 2
+        midy = self.height // 2
+        self.snake = SnakeBody(self.width, self.height, [(midx, midy), (midx - 1, midy), (midx - 2, midy)])
+        self.apple = self.random_apple()
+        self.planner = None  # D* Lite state kept between replans towards the same apple
+        self.planner_grid = None
+        self.score = 0
+        self.ticks = 0
+        self.replans = 0
+        self.planner_time = 0.0
+        self.game_over = False
+        # Modes:
+        # "compute" = A* is computing the path to the apple
+        # "move"    = snake is following the computed path
+        self.mode = "compute"
+        self.path = None  # Final computed path (deque of cells, excluding current head)
+        self.start_search()
+
+    def start_search(self):
+        self.replans += 1
+        self.search_elapsed = 0.0
+        self.query_stats = None
+        if self.query_writer is not None:
+            self.query_stats = SearchStats()
+            self.query_info = {"tick": self.ticks, "length": len(self.snake),
+                               "planner": "dstar_lite" if self.incremental else self.algorithm}
+        self.astar_generator = self.create_astar_generator()
+
+    def on_search_event(self, event):
+        # Hook for front-ends that animate the search
+        pass
+
+    def random_apple(self):
+        # Choose a random apple location not on the snake.
+        while True:
+            pos = (self.rng.randint(0, self.width - 1), self.rng.randint(0, self.height - 1))
+            if pos not in self.snake:
+                return pos
+
+    def create_astar_generator(self):
+        # Only D* Lite follows snake.changed; drop its stale state when it is not in use
+        if not self.incremental:
+            self.planner = None
+        if self.incremental:
+            return self.incremental_search()
+        # For planning, treat the snake's body (except the head) as obstacles.
+        self.snake.changed.clear()
+        grid = self.snake.obstacle_grid()
+        return astar_search(self.snake.head, self.apple, grid, self.visualize, self.algorithm, self.open_list,
+                            self.query_stats)
+
+    def incremental_search(self):
+        """
+        Plan with D* Lite, yielding a single DONE event like astar_search.
+        The planner is rebuilt when the apple moves; otherwise it is told which
+        cells changed since the last plan (the old head, the freed tail) and
+        only repairs around them.
+
+        In real games this is slower than searching again: over ten seeded
+        30x30 games, about 1.2 ms per replan against 0.9 ms for A*, although
+        two replans in three reuse the planner. Every new apple needs a full
+        backward search, and the repairs cost more in Python than A* on a
+        board this small. It is kept for comparing planners.
+        """
+        body = self.snake
+        if self.planner is None or self.planner.goal != self.planner_grid.index(*self.apple):
+            body.changed.clear()
+            self.planner_grid = grid = body.obstacle_grid()
+            self.planner = DStarLite(grid, grid.index(*body.head), grid.index(*self.apple))
+        else:
+            grid = self.planner_grid
+            self.planner.update(grid.index(*body.head), self.sync_obstacles(grid))
+        expansions = self.planner.expansions
+        path = self.planner.plan()
+        if self.query_stats is not None:
+            self.query_stats.expansions += self.planner.expansions - expansions
+        if path is not None:
+            path = [grid.coords(i) for i in path]
+        yield DONE, path
+
+    def sync_obstacles(self, grid):
+        """Copy the cells in snake.changed into an obstacle grid and return their indices."""
+        body = self.snake
+        changed = []
+        for cell in body.changed:
+            i = grid.index(*cell)
+            grid.set_wall(i, body.is_obstacle(cell))
+            changed.append(i)
+        body.changed.clear()
+        return changed
+
+    def is_safe(self, cell):
+        x, y = cell
+        # Check boundaries.
+        if not (1 <= x < self.width and 1 <= y < self.height):
+            return False
+        # In a normal move the tail is removed, so we allow the tail cell.
+        # Thus, obstacles are all snake segments except the tail.
+        return not self.snake.occupied_except_tail(cell)
+
+    def compute_reachable_area(self, start, blocked):
+        """Returns the number of cells reachable from 'start' given an occupancy buffer (non-zero = blocked)."""
+        return self.flood_fill.area(start[1] * self.width + start[0], blocked)
+
+    def fallback_move(self):
+        """Choose the safe move (among neighbors) that maximizes reachable area."""
+        head = self.snake.head
+        candidates = []
+        for d in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
+            new_head = (head[0] + d[0], head[1] + d[1])
+            if self.is_safe(new_head):
+                candidates.append(new_head)
+        if not candidates:
+            return None
+        # Area left after each move: new snake = [new_head] + snake[:-1],
+        # computed for all candidates from one labelling of the free cells.
+        areas = self.flood_fill.areas([y * self.width + x for x, y in candidates],
+                                      self.snake.blocked_except_tail())
+        # Choose the move with maximum reachable area.
+        best_area, best_move = max(zip(areas, candidates), key=lambda x: x[0])
+        return best_move
+
+    def update(self):
+        self.ticks += 1
+        if self.mode == "compute":
+            # Advance the search by this tick's budget of expansions (or to the end).
+            t0 = time.perf_counter()
+            budget = FrameBudget(self.steps_per_tick, self.time_per_tick)
+            done = False
+            for event in self.astar_generator:
+                self.on_search_event(event)
+                if event[0] == EXPAND and budget.step():
+                    break
+                if event[0] == DONE:
+                    # A* finished—check if a path was found.
+                    if event[1] is None:
+                        if self.verbose:
+                            print("No path to apple found! Using space-optimizing fallback move.")
+                        fallback = self.fallback_move()
+                        if fallback is not None:
+                            # Fallback: use the chosen move as a one-step path.
+                            self.path = deque([fallback])
+                        else:
+                            # If no safe move is found, simply do nothing.
+                            self.path = deque()
+                            self.game_over = True
+                    else:
+                        # Remove the first cell (current head) from the planned path.
+                        self.path = deque(event[1])
+                        self.path.popleft()
+                    self.mode = "move"
+                    done = True
+                    break
+            else:
+                self.mode = "move"
+            elapsed = time.perf_counter() - t0
+            self.planner_time += elapsed
+            self.search_elapsed += elapsed
+            if done and self.query_stats is not None:
+                # Measured across the ticks the search was stepped in, which the
+                # solvers cannot see when the search is animated
+                self.query_stats.search_time = self.search_elapsed
+                self.query_writer.write(self.query_stats, **self.query_info)
+
+        elif self.mode == "move":
+            # Follow the computed path (or fallback move) one step at a time.
+            if self.path and len(self.path) > 0:
+                next_cell = self.path.popleft()
+                if next_cell == self.apple:
+                    # Grow: add new head and keep tail.
+                    self.snake.push_head(next_cell)
+                    self.score += 1
+                    if len(self.snake) == self.width * self.height:
+                        # The board is full: nowhere left for an apple.
+                        self.game_over = True
+                        return
+                    self.apple = self.random_apple()
+                    self.mode = "compute"
+                    self.path = None
+                    self.start_search()
+                else:
+                    # Normal move: add new head and remove tail.
+                    self.snake.push_head(next_cell)
+                    self.snake.pop_tail()
+            else:
+                # No valid path (or finished path) – replan.
+                self.mode = "compute"
+                self.path = None
+                self.start_search()
+
+
+def play(seed, width=30, height=30, max_ticks=100_000, stall_ticks=None, **options):
+    """
+    Play one headless game and return its summary as a dict.
+    The game ends when the snake is trapped, fills the board, goes
+    ``stall_ticks`` ticks without eating (default: 4 * board area) or reaches
+    ``max_ticks``. ``options`` set SnakeSim attributes such as incremental.
+    """
+    if stall_ticks is None:
+        stall_ticks = 4 * width * height
+    sim = SnakeSim(width, height, seed, **options)
+
+    last_score = 0
+    last_meal = 0
+    outcome = "max_ticks"
+    t0 = time.perf_counter()
+    while sim.ticks < max_ticks:
+        sim.update()
+        if sim.game_over:
+            outcome = "won" if len(sim.snake) == width * height else "trapped"
+            break
+        if sim.score != last_score:
+            last_score = sim.score
+            last_meal = sim.ticks
+        elif sim.ticks - last_meal > stall_ticks:
+            outcome = "stalled"
+            break
+    return {
+        "seed": seed,
+        # The configuration, so rows of different runs can be told apart
+        "width": width,
+        "height": height,
+        "algorithm": sim.algorithm,
+        "open_list": sim.open_list,
+        "incremental": sim.incremental,
+        "max_ticks": max_ticks,
+        "score": sim.score,
+        "length": len(sim.snake),
+        "ticks": sim.ticks,
+        "replans": sim.replans,
+        "planner_time": round(sim.planner_time, 6),
+        "wall_time": round(time.perf_counter() - t0, 6),
+        "outcome": outcome,
+    }
+
+
+def run_batch(games, out_path, workers=None, base_seed=0, **play_options):
+    """
+    Play ``games`` seeded games across a process pool, writing each result to
+    ``out_path`` as it finishes. Raises FileExistsError rather than mixing
+    the games with those of an earlier run already in ``out_path``.
+    """
+    with open(out_path, "x") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play, base_seed + i, **play_options) for i in range(games)]
+        for future in as_completed(futures):
+            out.write(json.dumps(future.result()) + "\n")
+            out.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless snake games in parallel.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--out", default="snake_results.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--width", type=int, default=30)
+    parser.add_argument("--height", type=int, default=30)
+    parser.add_argument("--max-ticks", type=int, default=100_000)
+    parser.add_argument("--algorithm", choices=sorted(SOLVERS), default="astar")
+    parser.add_argument("--open-list", choices=sorted(OPEN_LISTS), default="heap")
+    parser.add_argument("--incremental", action="store_true", help="plan with D* Lite")
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} already exists; pick another --out or remove it")
+    t0 = time.perf_counter()
+    run_batch(args.games, args.out, args.workers, args.seed,
+              width=args.width, height=args.height, max_ticks=args.max_ticks,
+              algorithm=args.algorithm, open_list=args.open_list, incremental=args.incremental)
+    print(f"{args.games} games in {time.perf_counter() - t0:.1f}s -> {args.out}")
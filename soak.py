@@ -0,0 +1,113 @@
+"""
+Board loop and progress log for long unattended runs of the visualizers.
+
+squares.py, hexagons.py and procedural_maze_gen.py solve board after
+board, BOARDS of them or forever, and are left running for days as load
+demos. run_boards is that loop: it calls the front-end once per board
+with a fresh SearchStats, streams the statistics to STATS_FILE and counts
+the board in a SoakLog:
+
+    run_boards(lambda stats: a_star(start, end, stats), BOARDS, SOAK_LOG, STATS_FILE,
+               between=check_quit, algorithm=ALGORITHM)
+
+Every ``interval`` seconds the SoakLog prints one line with the boards
+per second, the average expansions per board and the resident memory of
+the process over that interval, and a finite run ends with the same
+figures over the whole run.
+
+Memory should stay flat once the first boards are drawn; a value that
+keeps growing is a leak.
+"""
+
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+from astar import SearchStats
+from instrument import QueryWriter
+
+
+def rss():
+    """Resident memory of this process in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # Only the peak is available here; macOS reports bytes, the rest KiB
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+class SoakLog:
+    def __init__(self, interval=60.0, out=sys.stdout):
+        self.interval = interval  # seconds between reports; 0 or None only counts
+        self.out = out
+        self.boards = 0
+        self.expansions = 0
+        self.started = self._last = time.perf_counter()
+        self._boards = 0  # since the last report
+        self._expansions = 0
+
+    def board(self, expansions=0):
+        """Count one finished board, reporting if the interval has passed."""
+        self.boards += 1
+        self.expansions += expansions
+        self._boards += 1
+        self._expansions += expansions
+        if self.interval and time.perf_counter() - self._last >= self.interval:
+            self.report()
+
+    def _print(self, label, boards, expansions, elapsed):
+        rate = boards / elapsed if elapsed > 0 else 0.0
+        average = expansions / boards if boards else 0.0
+        memory = rss()
+        memory = "?" if memory is None else f"{memory / 2 ** 20:.1f} MiB"
+        print(f"[{time.perf_counter() - self.started:9.0f}s] {label}: {rate:.2f} boards/s, "
+              f"{average:.0f} expansions/board, RSS {memory}", file=self.out, flush=True)
+
+    def report(self):
+        """Print the figures since the last report."""
+        now = time.perf_counter()
+        self._print(f"{self.boards} boards", self._boards, self._expansions, now - self._last)
+        self._last = now
+        self._boards = self._expansions = 0
+
+    def summary(self):
+        """Print the figures over the whole run."""
+        self._print(f"{self.boards} boards in total", self.boards, self.expansions,
+                    time.perf_counter() - self.started)
+
+
+def run_boards(solve_board, boards=None, interval=0, stats_file=None, between=None, **info):
+    """
+    Call ``solve_board(stats)`` for ``boards`` boards (None for no end) and
+    return the SoakLog that counted them. ``stats`` is a fresh SearchStats
+    when a report every ``interval`` seconds or ``stats_file`` needs one,
+    None otherwise; ``info`` describes the boards in ``stats_file``.
+    ``between()`` runs after every board, e.g. to check for a closed window.
+    """
+    soak = SoakLog(interval)
+    writer = QueryWriter(stats_file) if stats_file is not None else None
+    try:
+        while boards is None or soak.boards < boards:
+            stats = SearchStats() if writer is not None or interval else None
+            solve_board(stats)
+            if writer is not None:
+                writer.write(stats, **info)
+            soak.board(stats.expansions if stats is not None else 0)
+            if between is not None:
+                between()
+    finally:
+        if writer is not None:
+            writer.close()
+    if interval:
+        soak.summary()
+    return soak
@@ -0,0 +1,16 @@
+"""
+Interchangeable path solvers, selected by name in the front-ends.
+
+Every solver takes (grid, start, goal, on_expand=None, stats=None) and
+returns the path as a list of nodes, or None.
+"""
+
+from astar import solve
+from bidirectional import solve_bidirectional
+from jps import solve_jps
+
+SOLVERS = {
+    "astar": solve,
+    "jps": solve_jps,  # compact square grids only
+    "bidirectional": solve_bidirectional,
+}
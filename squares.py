@@ -1,18 +1,39 @@
-import heapq
 import pygame
 from time import sleep
 import random
+import sys
+
+from astar import random_walls, reconstruct_path
+from compact_grid import CompactGrid
+from frame_budget import FrameBudget
+from grid_view import ArrayView, GridView, opened_since
+from map_file import free_corners, load_map
+from path_cache import PathCache
+from soak import run_boards
+from solvers import SOLVERS
 
 # Constants
 WIDTH = 800  # Width of the window
 SQUARE_SIZE = 20  # Size of each square in the grid
 ROWS = 40  # Number of rows in the grid
 COLS = 40  # Number of columns in the grid
-SLEEP_TIME = 0.001  # Sleep time for visualization
+SLEEP_TIME = 0.001  # Sleep time for visualization, per frame
+RENDERER = "rects"  # "rects" repaints the changed cells, "array" draws whole frames with NumPy (for big grids)
+STEPS_PER_FRAME = 1  # Expansions run between two frames (None for no limit)
+FRAME_TIME = None  # Seconds of search between two frames (None for no limit)
+FPS = None  # Frame rate cap (see frame_budget.py)
 
 MIN_BLOCKS = 400  # Minimum number of blocked cells
 MAX_BLOCKS = 500  # Maximum number of blocked cells
 
+ALGORITHM = "astar"  # Search algorithm: "astar", "jps" or "bidirectional"
+MAP_FILE = None  # Solve the board saved in this map file (see map_file.py) instead of random ones
+CACHE_PATHS = False  # With MAP_FILE, answer the repeated query from a PathCache after the first board (see path_cache.py)
+MAP_BOARD = None  # (path, grid, PathCache) of the loaded MAP_FILE, kept across boards
+STATS_FILE = None  # Write the statistics of every search to this .csv or .jsonl file as it finishes (see instrument.py)
+BOARDS = None  # Number of boards to solve before exiting (None runs forever)
+SOAK_LOG = 0  # Print boards/s, average expansions and memory use every this many seconds (0 disables; see soak.py)
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -27,106 +48,104 @@ pygame.init()
 WIN = pygame.display.set_mode((WIDTH, WIDTH))
 pygame.display.set_caption('A* Pathfinding Algorithm')
 
-# Function to draw the grid
-def draw_grid():
-    WIN.fill(WHITE)
-    for i in range(ROWS):
-        pygame.draw.line(WIN, BLACK, (0, i * SQUARE_SIZE), (WIDTH, i * SQUARE_SIZE))
-        pygame.draw.line(WIN, BLACK, (i * SQUARE_SIZE, 0), (i * SQUARE_SIZE, WIDTH))
-
-# Function to draw the walls (blocked cells)
-def draw_walls(blocked_cells):
-    for cell in blocked_cells:
-        pygame.draw.rect(WIN, BLACK, (cell[0] * SQUARE_SIZE, cell[1] * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-# Function to draw the start and end points
-def draw_start_end(start, end):
-    pygame.draw.rect(WIN, YELLOW, (start[0] * SQUARE_SIZE, start[1] * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-    pygame.draw.rect(WIN, ORANGE, (end[0] * SQUARE_SIZE, end[1] * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-# Function to draw the current path
-def draw_current_path(path):
-    for cell in path:
-        pygame.draw.rect(WIN, BLUE, (cell[0] * SQUARE_SIZE, cell[1] * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-# Function to draw the visited cells
-def draw_visited_cells(visited_cells):
-    for cell in visited_cells:
-        pygame.draw.rect(WIN, RED, (cell[0] * SQUARE_SIZE, cell[1] * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-# Function to calculate the heuristic (Manhattan distance)
-def calculate_heuristic(x, y, end):
-    return abs(end[0] - x) + abs(end[1] - y)
-
-# A* algorithm implementation
-def a_star(start, end):
-    path_found = True
-
-    # Generate random blocked cells
-    blocked_cells = set()
-    for i in range(random.randint(MIN_BLOCKS, MAX_BLOCKS)):
-        x = random.randint(0, COLS - 1)
-        y = random.randint(0, ROWS - 1)
-        if (x, y) == start or (x, y) == end: continue
-        if (x, y) in blocked_cells: continue
-        blocked_cells.add((x, y))
-
-    # Priority queue for the A* algorithm
-    q = [(calculate_heuristic(start[0], start[1], end), 0, start[0], start[1], [(start[0], start[1])])]
-    g_scores = {start: 0}  # Dictionary to store the g-scores
-
-    while q:
+def check_quit():
+    # Pygame event handler
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+
+def map_board():
+    # The map is only loaded once, so its cache lives as long as the run
+    global MAP_BOARD
+    if MAP_BOARD is None or MAP_BOARD[0] != MAP_FILE:
+        grid, _ = load_map(MAP_FILE)
+        MAP_BOARD = (MAP_FILE, grid, PathCache(grid, SOLVERS[ALGORITHM]))
+    return MAP_BOARD[1], MAP_BOARD[2]
+
+# A* algorithm implementation: solve one board and return the path
+def a_star(start, end, stats=None):
+    cache = None
+    if MAP_FILE is not None:
+        grid, cache = map_board()
+        blocked_cells = grid.walls()
+        # The map's own corners; the window's may be off the map or walls on it
+        start, end = free_corners(grid)
+    else:
+        # Generate random blocked cells
+        blocked_cells = random_walls(COLS, ROWS, random.randint(MIN_BLOCKS, MAX_BLOCKS), (start, end))
+        grid = CompactGrid.from_walls(COLS, ROWS, blocked_cells)
+
+    start_i = grid.index(*start)
+    end_i = grid.index(*end)
+
+    # Scale the board to the window: SQUARE_SIZE for the random boards, whatever fits for a map
+    cell_size = WIDTH // max(grid.width, grid.height)
+    if cell_size < 1:
+        raise ValueError(f"{grid.width}x{grid.height} board does not fit a {WIDTH}px window")
+
+    # Paint the new board once; every expansion then only recolours the cells that changed
+    if RENDERER == "array":
+        view = ArrayView(grid.width, grid.height, cell_size, background=WHITE)
+    else:
+        # Lines would cover cells of a few pixels
+        view = GridView(grid.width, grid.height, cell_size, background=WHITE, lines=BLACK if cell_size >= 4 else None)
+    for x, y in blocked_cells:
+        view.set(grid.index(x, y), BLACK)
+    view.set(start_i, YELLOW)
+    view.set(end_i, ORANGE)
+    pygame.display.update(view.draw(WIN))
+
+    budget = FrameBudget(STEPS_PER_FRAME, FRAME_TIME, FPS)
+    seen = {}
+    shown = []  # path drawn in the last frame
+
+    # Draw ``path`` over the previous one and update the changed cells on screen
+    def show_path(path):
+        nonlocal shown
+        for i in shown:
+            view.set(i, RED)
+        shown = path
+        for i in shown:
+            view.set(i, BLUE)
+        view.set(start_i, YELLOW)
+        view.set(end_i, ORANGE)
+        pygame.display.update(view.draw(WIN))
+
+    # Record the cells that changed every time the solver expands a cell, and
+    # draw them once the frame's budget is spent
+    def on_expand(current, came_from):
+        # Visited cells, then the current path once a frame is due
+        for i in opened_since(came_from, seen):
+            view.set(i, RED)
+        if not budget.step():
+            return
         sleep(SLEEP_TIME)
-        
-        # Pygame event handler
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-
-        # Get the current node with the lowest f-score
-        f_score, g_score, x, y, path = heapq.heappop(q)
-        current = (x, y)
-
-        # Draw the current state of the grid
-        draw_grid()
-        draw_visited_cells(visited_cells)
-        draw_current_path(path)
-        draw_walls(blocked_cells)
-        draw_start_end(start, end)
-        pygame.display.update()
-
-        # Check if we have reached the end
-        if current == end:
-            break
-
-        # Explore the neighbors
-        for nx, ny in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
-            neighbor = (nx, ny)
-            if neighbor in visited_cells: continue
-            if nx < 0 or nx > COLS - 1: continue
-            if ny < 0 or ny > ROWS - 1: continue
-            if neighbor in blocked_cells: continue
-            if neighbor in path: continue
-
-            tentative_g_score = g_score + 1
-
-            # If this path to the neighbor is better, update the path
-            if neighbor not in g_scores or tentative_g_score < g_scores[neighbor]:
-                g_scores[neighbor] = tentative_g_score
-                f_score = tentative_g_score + calculate_heuristic(nx, ny, end)
-                visited_cells.add(neighbor)
-                heapq.heappush(q, (f_score, tentative_g_score, nx, ny, path + [neighbor]))
+        check_quit()
+        show_path(reconstruct_path(came_from, current))
+        budget.wait()
+
+    if cache is not None and CACHE_PATHS:
+        # Only a miss runs (and animates) the search
+        path = cache.find_path(start_i, end_i, on_expand=on_expand, stats=stats)
     else:
-        path_found = False
-    visited_cells.clear()
-    
-    # If path is found, sleep for a while before restarting
-    if path_found: sleep(SLEEP_TIME * 100)
-    a_star(start, end)
+        path = SOLVERS[ALGORITHM](grid, start_i, end_i, on_expand, stats)
+    if path is not None:
+        # The frame of the last expansion may have been skipped
+        show_path(path)
+    return path
+
+def run(start, end, boards=None):
+    # Solve ``boards`` boards one after another (None for no end); a loop
+    # rather than a_star calling itself, so a long run keeps a flat stack
+    def board(stats):
+        path = a_star(start, end, stats)
+        # If path is found, sleep for a while before restarting
+        if path is not None: sleep(SLEEP_TIME * 100)
+
+    run_boards(board, boards, SOAK_LOG, STATS_FILE, check_quit, algorithm=ALGORITHM, size=COLS)
 
 if __name__ == '__main__':
     start = (0, 0)  # Starting point
     end = ((WIDTH // SQUARE_SIZE) - 1, (WIDTH // SQUARE_SIZE) - 1)  # Ending point
-    visited_cells = set()  # Set to store visited cells
-    a_star(start, end)  # Run the A* algorithm
+    run(start, end, BOARDS)  # Run the A* algorithm